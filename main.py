@@ -7,6 +7,8 @@ A bot that learns your personality and interaction style to automatically engage
 import asyncio
 import sys
 import signal
+import httpx
+import openai
 from pathlib import Path
 from loguru import logger
 from dotenv import load_dotenv
@@ -16,7 +18,10 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from utils.config import Config
 from utils.database import Database
+from utils.cache import PersonalityCache
+from utils.ratelimit import DecorrelatedJitter, TokenBucket, twitter_buckets
 from twitter_api.client import TwitterClient
+from twitter_api.stream import StreamingIngestor
 from personality_analyzer.analyzer import PersonalityAnalyzer
 from data_collector.collector import DataCollector
 from decision_engine.engine import DecisionEngine
@@ -29,11 +34,41 @@ class TwitterBot:
     def __init__(self):
         self.config = Config()
         self.db = Database(self.config.database_url)
-        self.twitter_client = TwitterClient(self.config)
-        self.personality_analyzer = PersonalityAnalyzer(self.config, self.db)
+        self.personality_cache = PersonalityCache(self.db)
+        
+        # Rate limiters are shared by every coroutine using the APIs
+        self.twitter_buckets = twitter_buckets()
+        self.openai_bucket = TokenBucket.for_window(self.config.openai.tokens_per_minute, 60)
+        
+        # One keep-alive HTTP/2 connection pool for the whole process
+        self.http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(60.0, connect=3.0)
+        )
+        
+        # The OpenAI client applies its own default timeout per request, so hand
+        # it the shared pool's timeout explicitly
+        self.openai_client = openai.AsyncOpenAI(
+            api_key=self.config.openai.api_key,
+            http_client=self.http,
+            timeout=self.http.timeout
+        )
+        
+        self.twitter_client = TwitterClient(self.config, self.http, self.twitter_buckets)
+        self.personality_analyzer = PersonalityAnalyzer(
+            self.config, self.db, self.personality_cache, self.openai_bucket, self.openai_client
+        )
         self.data_collector = DataCollector(self.config, self.db, self.twitter_client)
-        self.content_generator = ContentGenerator(self.config, self.db)
-        self.decision_engine = DecisionEngine(self.config, self.db)
+        self.content_generator = ContentGenerator(
+            self.config, self.db, self.personality_cache, self.openai_bucket, self.openai_client
+        )
+        self.decision_engine = DecisionEngine(self.config, self.db, self.personality_cache)
+        self.ingestor = StreamingIngestor(self.config, self.twitter_client)
+        self._sem = asyncio.Semaphore(self.config.worker_concurrency)
+        self._pending_interactions = []
+        self._backoff = DecorrelatedJitter(base=60, cap=3600)
+        self._shutdown = asyncio.Event()
         self.running = False
         
     async def initialize(self):
@@ -82,39 +117,140 @@ class TwitterBot:
         self.running = True
         logger.info("Starting bot main loop...")
         
+        await self.ingestor.start()
+        reconcile_task = asyncio.create_task(self._reconcile_loop())
+        
+        pending = set()
+        
+        try:
+            # Tweets and mentions are pushed by the stream/webhook
+            async for source, tweet in self.ingestor:
+                # Stop pulling from the queue while the worker backlog is full
+                if len(pending) >= self.config.worker_concurrency:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.add(asyncio.create_task(self._dispatch(source, tweet)))
+        finally:
+            # Let an in-flight reconciliation pass finish so it releases failed
+            # claims and flushes its interactions rather than being cancelled
+            self.running = False
+            self._shutdown.set()
+            await asyncio.gather(reconcile_task, *pending, return_exceptions=True)
+            await self.ingestor.stop()
+        
+    async def _reconcile_loop(self):
+        """Poll timeline and mentions to catch anything the stream missed."""
+        interval = self._base_poll_interval()
+        
         while self.running:
-            try:
-                # Check timeline for new content
-                await self.process_timeline()
-                
-                # Check mentions
-                await self.process_mentions()
+            # Check timeline and mentions concurrently so their requests interleave
+            results = await asyncio.gather(
+                self.process_timeline(),
+                self.process_mentions(),
+                return_exceptions=True
+            )
+            
+            failed = False
+            for branch, result in zip(("timeline", "mentions"), results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error in {branch} reconciliation poll: {result}")
+                    failed = True
+                    
+            if failed:
+                # Jittered backoff keeps restarts from retrying in lockstep
+                await self._wait_for_shutdown(self._backoff.next())
+                continue
                 
-                # Wait before next iteration (longer in lite mode to save API calls)
-                interval = self.config.timeline_check_interval
-                if self.config.lite_mode:
-                    interval = max(interval * 4, 240)  # At least 4 hours in lite mode
-                await asyncio.sleep(interval * 60)
+            self._backoff.reset()
+            
+            # Poll sooner while there is activity, back off while quiet,
+            # but never faster than configured
+            base = self._base_poll_interval()
+            had_tweets = any(results)
+            interval = interval * 0.9 if had_tweets else interval * 1.5
+            interval = min(max(interval, base), base * 4)
+            await self._wait_for_shutdown(interval * 60)
+            
+    async def _wait_for_shutdown(self, timeout: float):
+        """Sleep for up to timeout seconds, returning early on shutdown."""
+        try:
+            await asyncio.wait_for(self._shutdown.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+            
+    def _base_poll_interval(self) -> float:
+        """Configured poll interval in minutes."""
+        # Poll rarely while the stream is delivering; otherwise this is the only source
+        if self.ingestor.connected:
+            return self.config.reconciliation_interval
+            
+        interval = self.config.timeline_check_interval
+        if self.config.lite_mode:
+            interval = max(interval * 4, 240)  # At least 4 hours in lite mode
+        return interval
+        
+    async def _dispatch(self, source, tweet):
+        """Route a pushed tweet to the timeline or mention pipeline."""
+        try:
+            # The in-memory filter answers most repeats without a database write;
+            # claiming up front keeps stream and poll from handling the same tweet
+            if await self.db.is_tweet_processed(tweet.id) or not await self.db.claim_tweet(tweet.id):
+                return
+        except Exception as e:
+            logger.error(f"Failed to claim tweet {tweet.id}: {e}")
+            return
+            
+        try:
+            if source == "mention":
+                await self._handle_mention(tweet)
+            else:
+                await self._handle_tweet(tweet)
                 
-            except KeyboardInterrupt:
-                logger.info("Received interrupt signal, shutting down...")
-                break
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                await asyncio.sleep(60)  # Wait a minute before retrying
+            await self._flush_interactions()
+        except Exception as e:
+            logger.error(f"Error dispatching tweet {tweet.id}: {e}")
+            await self.db.release_tweets([tweet.id])
+            
+    async def _process_batch(self, handler, tweets) -> int:
+        """Run a handler over newly claimed tweets concurrently and return how many."""
+        # Most of a poll has been seen before; drop those without a write
+        seen = await self.db.are_tweets_processed([t.id for t in tweets])
+        claimed = await self.db.claim_tweets([t.id for t in tweets if t.id not in seen])
+        tweets = [t for t in tweets if t.id in claimed]
+        
+        results = await asyncio.gather(*(handler(t) for t in tweets), return_exceptions=True)
+        
+        failed = []
+        for tweet, result in zip(tweets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing tweet {tweet.id}: {result}")
+                failed.append(tweet.id)
                 
-    async def process_timeline(self):
+        # Let the next pass retry tweets whose handling failed
+        await self.db.release_tweets(failed)
+        await self._flush_interactions()
+        
+        return len(tweets)
+        
+    async def _flush_interactions(self):
+        """Write buffered interaction log entries in one batch."""
+        if not self._pending_interactions:
+            return
+            
+        interactions, self._pending_interactions = self._pending_interactions, []
+        await self.db.log_interactions(interactions)
+        
+    async def process_timeline(self) -> int:
         """Process timeline tweets and decide on interactions."""
         logger.debug("Processing timeline...")
         
         # Get recent timeline tweets
         tweets = await self.twitter_client.get_timeline_tweets()
         
-        for tweet in tweets:
-            # Skip if already processed
-            if await self.db.is_tweet_processed(tweet.id):
-                continue
-                
+        return await self._process_batch(self._handle_tweet, tweets)
+        
+    async def _handle_tweet(self, tweet):
+        """Decide on and perform interactions for a single tweet."""
+        async with self._sem:
             # Analyze tweet and decide on action
             decision = await self.decision_engine.analyze_tweet(tweet)
             
@@ -127,42 +263,48 @@ class TwitterBot:
             if decision.should_retweet:
                 await self.retweet_tweet(tweet, decision)
                 
-            # Mark tweet as processed
-            await self.db.mark_tweet_processed(tweet.id)
-            
-    async def process_mentions(self):
+    async def process_mentions(self) -> int:
         """Process mentions and replies."""
         logger.debug("Processing mentions...")
         
         mentions = await self.twitter_client.get_mentions()
         
-        for mention in mentions:
-            if await self.db.is_tweet_processed(mention.id):
-                continue
-                
+        return await self._process_batch(self._handle_mention, mentions)
+        
+    async def _handle_mention(self, mention):
+        """Respond to a single mention."""
+        async with self._sem:
             # Analyze mention and generate response
             decision = await self.decision_engine.analyze_mention(mention)
             
             if decision.should_reply:
                 await self.reply_to_tweet(mention, decision)
                 
-            await self.db.mark_tweet_processed(mention.id)
-            
     async def like_tweet(self, tweet, decision):
         """Like a tweet."""
         if self.config.dry_run:
             logger.info(f"[DRY RUN] Would like tweet: {tweet.text[:50]}...")
             return
             
+        if not await self._reserve_action('like', tweet.id):
+            return
+            
         success = await self.twitter_client.like_tweet(tweet.id)
         if success:
             logger.info(f"Liked tweet by @{tweet.author.username}")
-            await self.db.log_interaction("like", tweet.id, decision.reasoning)
+            self._pending_interactions.append(("like", tweet.id, decision.reasoning, None))
         else:
             logger.error(f"Failed to like tweet {tweet.id}")
             
     async def reply_to_tweet(self, tweet, decision):
         """Reply to a tweet."""
+        # Don't pay for a reply that the hourly limit won't let us post
+        if not self.config.dry_run and not await self.db.can_perform_action(
+            'reply', self.config.rate_limits.replies_per_hour
+        ):
+            logger.info(f"Skipping reply to tweet {tweet.id}: hourly reply limit reached")
+            return
+            
         # Generate response
         response_text = await self.content_generator.generate_reply(tweet, decision)
         
@@ -174,10 +316,13 @@ class TwitterBot:
             logger.info(f"[DRY RUN] Would reply to @{tweet.author.username}: {response_text}")
             return
             
+        if not await self._reserve_action('reply', tweet.id):
+            return
+            
         success = await self.twitter_client.reply_to_tweet(tweet.id, response_text)
         if success:
             logger.info(f"Replied to @{tweet.author.username}")
-            await self.db.log_interaction("reply", tweet.id, decision.reasoning, response_text)
+            self._pending_interactions.append(("reply", tweet.id, decision.reasoning, response_text))
         else:
             logger.error(f"Failed to reply to tweet {tweet.id}")
             
@@ -187,17 +332,44 @@ class TwitterBot:
             logger.info(f"[DRY RUN] Would retweet: {tweet.text[:50]}...")
             return
             
+        if not await self._reserve_action('retweet', tweet.id):
+            return
+            
         success = await self.twitter_client.retweet(tweet.id)
         if success:
             logger.info(f"Retweeted tweet by @{tweet.author.username}")
-            await self.db.log_interaction("retweet", tweet.id, decision.reasoning)
+            self._pending_interactions.append(("retweet", tweet.id, decision.reasoning, None))
         else:
             logger.error(f"Failed to retweet tweet {tweet.id}")
             
+    async def _reserve_action(self, action: str, tweet_id: str) -> bool:
+        """Take a slot in the action's hourly limit, logging a skip when none is left."""
+        limits = self.config.rate_limits
+        max_per_hour = {
+            'like': limits.likes_per_hour,
+            'retweet': limits.retweets_per_hour,
+            'reply': limits.replies_per_hour
+        }[action]
+        
+        if await self.db.reserve_action(action, max_per_hour):
+            return True
+            
+        logger.info(f"Skipping {action} of tweet {tweet_id}: hourly {action} limit reached")
+        return False
+        
     def stop(self):
         """Stop the bot."""
         self.running = False
+        self._shutdown.set()
+        self.ingestor.stop_nowait()
         logger.info("Bot stopping...")
+        
+    async def close(self):
+        """Release shared network and database resources."""
+        await self.http.aclose()
+        await self._flush_interactions()
+        await self.db.flush()
+        self.db.close()
 
 
 async def main():
@@ -212,20 +384,29 @@ async def main():
     # Create bot instance
     bot = TwitterBot()
     
-    # Setup signal handlers
-    def signal_handler(signum, frame):
+    # Setup signal handlers on the event loop so in-flight awaits can drain
+    loop = asyncio.get_running_loop()
+    
+    def signal_handler(signum):
         logger.info(f"Received signal {signum}")
         bot.stop()
         
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, signal_handler, signum)
+        except NotImplementedError:
+            # Windows event loops have no add_signal_handler
+            signal.signal(signum, lambda s, frame: loop.call_soon_threadsafe(signal_handler, s))
     
     # Initialize and run bot
-    if await bot.initialize():
-        await bot.run()
-    else:
-        logger.error("Failed to initialize bot")
-        sys.exit(1)
+    try:
+        if await bot.initialize():
+            await bot.run()
+        else:
+            logger.error("Failed to initialize bot")
+            sys.exit(1)
+    finally:
+        await bot.close()
         
     logger.info("Bot shutdown complete")
 
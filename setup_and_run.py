@@ -70,11 +70,13 @@ async def test_twitter_connection():
     print("🐦 Testing X API connection...")
     
     try:
+        import httpx
         from twitter_api.client import TwitterClient
         config = Config()
         
-        client = TwitterClient(config)
-        success = await client.verify_credentials()
+        async with httpx.AsyncClient(http2=True) as http:
+            client = TwitterClient(config, http)
+            success = await client.verify_credentials()
         
         if success:
             print("✅ X API connection successful!")
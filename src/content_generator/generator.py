@@ -1,43 +1,92 @@
 """Content generator for creating responses."""
 
-import openai
-from typing import Optional, Dict, Any
+import math
+import re
+from typing import TYPE_CHECKING, Optional, Dict
 from loguru import logger
 
+from utils.text import MAX_TWEET_LENGTH, URL_RE, truncate_tweet
+
+if TYPE_CHECKING:
+    from decision_engine.engine import Decision
+    from twitter_api.client import Tweet
+
+
+MENTION_RE = re.compile(r"@\w+")
+WORD_RE = re.compile(r"\w+")
+
+# Tweets with fewer real words than this give the model nothing to reply to
+MIN_REPLY_WORDS = 3
+
+# ~3.5 characters per token; anything longer is truncated anyway
+REPLY_TOKEN_LIMIT = math.ceil(MAX_TWEET_LENGTH / 3.5)
+
 
 class ContentGenerator:
     """Generates content based on user's personality."""
     
-    def __init__(self, config, db):
+    SYSTEM_PROMPT = "You are a helpful and engaging X user. Generate natural responses."
+    
+    RESPONSE_PROMPT = """
+Respond to this tweet: "{text}"
+
+Author: @{author}
+Context: {context}
+
+Generate a helpful, engaging reply that fits the user's personality. Keep it under 280 characters.
+"""
+    
+    def __init__(self, config, db, personality_cache, openai_bucket, openai_client):
         self.config = config
         self.db = db
-        self.openai_client = openai.OpenAI(api_key=config.openai.api_key)
+        self.personality_cache = personality_cache
+        self.openai_bucket = openai_bucket
+        self.openai_client = openai_client
+        self._system_message = {"role": "system", "content": self.SYSTEM_PROMPT}
+        self._system_message_for = None
         
-    async def generate_reply(self, tweet: 'Tweet', decision: Dict[str, Any]) -> Optional[str]:
+    async def generate_reply(self, tweet: 'Tweet', decision: 'Decision') -> Optional[str]:
         """Generate a reply to a tweet."""
         try:
+            # Skip the API call for tweets that are only links, mentions or a word or two
+            words = WORD_RE.findall(MENTION_RE.sub(" ", URL_RE.sub(" ", tweet.text)))
+            if len(words) < MIN_REPLY_WORDS:
+                logger.info(f"Skipping reply generation for low-content tweet {tweet.id}")
+                return None
+                
             # Get personality profile
-            personality = await self.db.get_personality_profile()
+            personality = await self.personality_cache.get()
             
             # Create prompt for response generation
-            prompt = self._create_response_prompt(tweet, personality, decision)
+            prompt = self.RESPONSE_PROMPT.format(
+                text=tweet.text,
+                author=tweet.author.username,
+                context=decision.reasoning or 'General response'
+            )
+            system_message = self._get_system_message(personality)
+            
+            # No point paying for more tokens than fit in a tweet
+            max_tokens = min(self.config.openai.max_tokens, REPLY_TOKEN_LIMIT)
+            
+            # Reserve prompt (~4 chars per token) plus completion budget
+            prompt_chars = len(system_message["content"]) + len(prompt)
+            await self.openai_bucket.acquire(prompt_chars // 4 + max_tokens)
             
             # Generate response using AI
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=self.config.openai.model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful and engaging X user. Generate natural responses."},
+                    system_message,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.config.openai.temperature,
-                max_tokens=self.config.openai.max_tokens
+                max_tokens=max_tokens
             )
             
             reply_text = response.choices[0].message.content.strip()
             
-            # Ensure reply fits X character limit
-            if len(reply_text) > 280:
-                reply_text = reply_text[:277] + "..."
+            # Ensure reply fits X's weighted character limit
+            reply_text = truncate_tweet(reply_text)
                 
             logger.info(f"Generated reply: {reply_text}")
             return reply_text
@@ -46,8 +95,19 @@ class ContentGenerator:
             logger.error(f"Failed to generate reply: {e}")
             return None
             
-    def _create_response_prompt(self, tweet: 'Tweet', personality: Dict, decision: Dict) -> str:
-        """Create prompt for response generation."""
+    def _get_system_message(self, personality: Optional[Dict]) -> Dict[str, str]:
+        """Get the system message, rebuilding it only when the profile changes."""
+        # PersonalityCache hands back the same dict until it refreshes
+        if personality is not self._system_message_for:
+            personality_desc = self._describe_personality(personality)
+            content = f"{self.SYSTEM_PROMPT} {personality_desc}".strip()
+            self._system_message = {"role": "system", "content": content}
+            self._system_message_for = personality
+            
+        return self._system_message
+        
+    def _describe_personality(self, personality: Optional[Dict]) -> str:
+        """Describe the user's voice for the system prompt."""
         personality_desc = ""
         if personality:
             humor = personality.get('humor_level', {}).get('score', 0.5)
@@ -59,14 +119,5 @@ class ContentGenerator:
                 personality_desc += "Be casual and informal. "
             else:
                 personality_desc += "Be professional but friendly. "
-        
-        return f"""
-{personality_desc}
-
-Respond to this tweet: "{tweet.text}"
-
-Author: @{tweet.author.username}
-Context: {decision.get('reasoning', 'General response')}
-
-Generate a helpful, engaging reply that fits the user's personality. Keep it under 280 characters.
-"""
+                
+        return personality_desc
@@ -1,10 +1,12 @@
 """Data collector for gathering user's X data."""
 
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Dict, Any
 from loguru import logger
 
+if TYPE_CHECKING:
+    from twitter_api.client import TweetBatch
+
 
 class DataCollector:
     """Collects user's X data for personality analysis."""
@@ -24,11 +26,13 @@ class DataCollector:
             logger.error(f"Failed to get user info for @{self.config.bot_username}")
             return {}
             
-        # Collect different types of data
-        user_tweets = await self._collect_user_tweets()
-        user_likes = await self._collect_user_likes(user_info.id)
+        # Collect different types of data concurrently, saving as we go
+        user_tweets, user_likes = await asyncio.gather(
+            self._save_pages(self._iter_user_tweets()),
+            self._save_pages(self._iter_user_likes(user_info.id))
+        )
         
-        # Prepare data for analysis
+        # Prepare data for analysis (tweet text only; full records are in the database)
         collected_data = {
             'user_info': {
                 'username': user_info.username,
@@ -41,129 +45,102 @@ class DataCollector:
             'total_interactions': len(user_tweets) + len(user_likes)
         }
         
-        # Save to database
-        await self._save_collected_data(collected_data)
-        
         logger.info(f"Data collection complete: {len(user_tweets)} tweets, {len(user_likes)} likes")
         return collected_data
         
-    async def _collect_user_tweets(self) -> List[Dict[str, Any]]:
-        """Collect user's tweets."""
+    async def _iter_user_tweets(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield user's tweets as database records, one API page at a time."""
         try:
             count = self.config.get('personality.tweet_analysis_count', 1000)
-            tweets = await self.twitter_client.get_user_tweets(
+            async for batch in self.twitter_client.iter_user_tweet_batches(
                 self.config.bot_username, 
                 count=count
-            )
-            
-            tweet_data = []
-            for tweet in tweets:
-                tweet_data.append({
-                    'tweet_id': tweet.id,
-                    'content': tweet.text,
-                    'interaction_type': 'tweet',
-                    'timestamp': tweet.created_at,
-                    'metadata': {
-                        'public_metrics': tweet.public_metrics,
-                        'context_annotations': tweet.context_annotations or []
-                    }
-                })
-                
-            return tweet_data
-            
+            ):
+                yield list(self._batch_records(batch))
         except Exception as e:
             logger.error(f"Failed to collect user tweets: {e}")
-            return []
+        
+    def _batch_records(self, batch: 'TweetBatch') -> Iterator[Dict[str, Any]]:
+        """Build database records from the batch columns, one row at a time."""
+        # Read the columns directly rather than materializing a Tweet per row
+        for i in range(len(batch)):
+            yield {
+                'tweet_id': batch.ids[i],
+                'content': batch.texts[i],
+                'interaction_type': 'tweet',
+                'timestamp': batch.created_at[i],
+                'metadata': {
+                    'public_metrics': batch.public_metrics[i],
+                    'context_annotations': batch.context_annotations[i]
+                }
+            }
             
-    async def _collect_user_likes(self, user_id: str) -> List[Dict[str, Any]]:
-        """Collect user's liked tweets."""
+    async def _iter_user_likes(self, user_id: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield user's liked tweets as database records, one API page at a time."""
         try:
             count = self.config.get('personality.tweet_analysis_count', 1000) // 2  # Collect fewer likes
-            likes = await self.twitter_client.get_user_likes(user_id, count=count)
-            
-            like_data = []
-            for tweet in likes:
-                like_data.append({
-                    'tweet_id': tweet.id,
-                    'content': tweet.text,
-                    'interaction_type': 'like',
-                    'timestamp': tweet.created_at,
-                    'metadata': {
-                        'original_author': tweet.author.username,
-                        'public_metrics': tweet.public_metrics,
-                        'context_annotations': tweet.context_annotations or []
-                    }
-                })
-                
-            return like_data
-            
+            async for likes in self.twitter_client.iter_user_likes(user_id, count=count):
+                yield [self._like_record(tweet) for tweet in likes]
         except Exception as e:
             logger.error(f"Failed to collect user likes: {e}")
-            return []
             
-    async def _save_collected_data(self, data: Dict[str, Any]):
-        """Save collected data to database."""
+    def _like_record(self, tweet) -> Dict[str, Any]:
+        """Build the database record for a liked tweet."""
+        return {
+            'tweet_id': tweet.id,
+            'content': tweet.text,
+            'interaction_type': 'like',
+            'timestamp': tweet.created_at,
+            'metadata': {
+                'original_author': tweet.author.username,
+                'public_metrics': tweet.public_metrics,
+                'context_annotations': tweet.context_annotations
+            }
+        }
+        
+    async def _save_pages(self, pages: AsyncIterator[List[Dict[str, Any]]]) -> List[str]:
+        """Save each page of records as it arrives and return their text.
+        
+        Only the text is kept; it is what the personality analysis consumes.
+        """
+        contents = []
+        
         try:
-            # Combine tweets and likes for storage
-            all_interactions = data['tweets'] + data['likes']
+            async for records in pages:
+                if records:
+                    await self.db.save_user_data(records)
+                    contents.extend(record['content'] for record in records)
+                    
+            logger.info(f"Saved {len(contents)} interactions to database")
             
-            if all_interactions:
-                await self.db.save_user_data(all_interactions)
-                logger.info(f"Saved {len(all_interactions)} interactions to database")
-            else:
-                logger.warning("No interactions to save")
-                
         except Exception as e:
             logger.error(f"Failed to save collected data: {e}")
             
+        return contents
+        
     async def update_recent_interactions(self) -> bool:
         """Update with recent user interactions."""
         try:
             logger.info("Updating recent interactions...")
             
-            # Get recent tweets (last 50)
-            recent_tweets = await self.twitter_client.get_user_tweets(
-                self.config.bot_username, 
-                count=50
-            )
+            # Only ask for tweets newer than the last one saved; the liked
+            # tweets endpoint has no since_id, so likes rely on upsert dedupe
+            last_tweet_id = await self.db.get_last_seen('tweet')
             
-            # Get user info for likes
-            user_info = await self.twitter_client.get_user_info(self.config.bot_username)
-            if user_info:
-                recent_likes = await self.twitter_client.get_user_likes(
-                    user_info.id, 
-                    count=25
-                )
-            else:
-                recent_likes = []
+            # Get recent tweets (last 50) and likes concurrently
+            recent_tweets, recent_likes = await asyncio.gather(
+                self.twitter_client.get_user_tweet_batch(
+                    self.config.bot_username, 
+                    count=50,
+                    since_id=last_tweet_id
+                ),
+                self._get_recent_likes()
+            )
             
             # Process and save new data
-            new_data = []
-            
-            for tweet in recent_tweets:
-                new_data.append({
-                    'tweet_id': tweet.id,
-                    'content': tweet.text,
-                    'interaction_type': 'tweet',
-                    'timestamp': tweet.created_at,
-                    'metadata': {
-                        'public_metrics': tweet.public_metrics,
-                        'context_annotations': tweet.context_annotations or []
-                    }
-                })
+            new_data = list(self._batch_records(recent_tweets)) if recent_tweets else []
                 
-            for tweet in recent_likes:
-                new_data.append({
-                    'tweet_id': tweet.id,
-                    'content': tweet.text,
-                    'interaction_type': 'like',
-                    'timestamp': tweet.created_at,
-                    'metadata': {
-                        'original_author': tweet.author.username,
-                        'public_metrics': tweet.public_metrics,
-                        'context_annotations': tweet.context_annotations or []
-                    }
-                })
+            new_data.extend(self._like_record(tweet) for tweet in recent_likes)
             
             if new_data:
                 await self.db.save_user_data(new_data)
@@ -176,3 +153,15 @@ class DataCollector:
         except Exception as e:
             logger.error(f"Failed to update recent interactions: {e}")
             return False
+            
+    async def _get_recent_likes(self) -> List[Any]:
+        """Get the user's most recent likes."""
+        # Get user info for likes
+        user_info = await self.twitter_client.get_user_info(self.config.bot_username)
+        if not user_info:
+            return []
+            
+        return await self.twitter_client.get_user_likes(
+            user_info.id, 
+            count=25
+        )
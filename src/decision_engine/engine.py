@@ -1,60 +1,105 @@
 """Decision engine for determining bot actions."""
 
-from typing import Dict, Any
-from dataclasses import dataclass
+import re
+from typing import FrozenSet, List, Optional
 from loguru import logger
 
 
-@dataclass
+# Keyword sets are matched against whole lowercase words
+HUMOR_WORDS = frozenset({'funny', 'lol', 'joke', 'jokes', 'humor', 'humour', 'hilarious'})
+TECH_WORDS = frozenset({'tech', 'technology', 'programming', 'code', 'coding', 'software'})
+POSITIVE_WORDS = frozenset({
+    'thank', 'thanks', 'thankful', 'awesome', 'great', 'excellent',
+    'amazing', 'love', 'loved', 'brilliant'
+})
+VALUABLE_WORDS = frozenset({
+    'tutorial', 'tutorials', 'guide', 'guides', 'tip', 'tips',
+    'resource', 'resources', 'useful', 'important'
+})
+
+KEYWORD_TAGS = {
+    **{word: 'humor' for word in HUMOR_WORDS},
+    **{word: 'tech' for word in TECH_WORDS},
+    **{word: 'positive' for word in POSITIVE_WORDS},
+    **{word: 'valuable' for word in VALUABLE_WORDS},
+}
+
+# One alternation covering every criterion, so each tweet is scanned once
+CRITERIA_RE = re.compile(
+    r"(?P<rt_marker>^rt @|via @)|\b(?P<word>"
+    + "|".join(sorted(map(re.escape, KEYWORD_TAGS), key=len, reverse=True))
+    + r")\b"
+)
+
+
+def scan_criteria(tweet_text: str) -> FrozenSet[str]:
+    """Return the criteria tags found in lowercased tweet text."""
+    hits = set()
+    for match in CRITERIA_RE.finditer(tweet_text):
+        word = match.group('word')
+        hits.add(KEYWORD_TAGS[word] if word else 'rt_marker')
+    return frozenset(hits)
+
+
 class Decision:
     """Decision result for tweet interaction."""
-    should_reply: bool = False
-    should_like: bool = False
-    should_retweet: bool = False
-    reasoning: str = ""
-    confidence: float = 0.0
+    
+    __slots__ = ('should_reply', 'should_like', 'should_retweet', 'reasons', 'confidence')
+    
+    def __init__(self, should_reply: bool = False, should_like: bool = False,
+                 should_retweet: bool = False, reasons: Optional[List[str]] = None,
+                 confidence: float = 0.0):
+        self.should_reply = should_reply
+        self.should_like = should_like
+        self.should_retweet = should_retweet
+        self.reasons = reasons if reasons is not None else []
+        self.confidence = confidence
+        
+    @property
+    def reasoning(self) -> str:
+        """Human-readable explanation of the decision."""
+        return " ".join(self.reasons)
 
 
 class DecisionEngine:
     """Determines when and how the bot should interact."""
     
-    def __init__(self, config, db):
+    def __init__(self, config, db, personality_cache):
         self.config = config
         self.db = db
+        self.personality_cache = personality_cache
         
     async def analyze_tweet(self, tweet) -> Decision:
         """Analyze tweets for possible interactions."""
         decision = Decision()
         
         # Get personality profile for context
-        personality = await self.db.get_personality_profile()
+        personality = await self.personality_cache.get()
         
-        # Analyze tweet content
-        tweet_text = tweet.text.lower()
+        # Analyze tweet content once for all criteria
+        hits = scan_criteria(tweet.text.lower())
         
         # Decision logic based on personality and content
-        if self._meets_criteria_for_reply(tweet, personality):
+        if self._meets_criteria_for_reply(tweet, personality, hits):
             decision.should_reply = True
-            decision.reasoning += "Fits reply criteria. "
+            decision.reasons.append("Fits reply criteria.")
             decision.confidence += 0.3
         
-        if self._meets_criteria_for_like(tweet, personality):
+        if self._meets_criteria_for_like(tweet, personality, hits):
             decision.should_like = True
-            decision.reasoning += "Meets like criteria. "
+            decision.reasons.append("Meets like criteria.")
             decision.confidence += 0.2
         
-        if self._meets_criteria_for_retweet(tweet, personality):
+        if self._meets_criteria_for_retweet(tweet, personality, hits):
             decision.should_retweet = True
-            decision.reasoning += "Meets retweet criteria. "
+            decision.reasons.append("Meets retweet criteria.")
             decision.confidence += 0.4
         
         logger.debug(f"Decision for tweet {tweet.id}: Reply={decision.should_reply}, Like={decision.should_like}, Retweet={decision.should_retweet}, Confidence={decision.confidence:.2f}")
         return decision
 
-    def _meets_criteria_for_reply(self, tweet, personality) -> bool:
+    def _meets_criteria_for_reply(self, tweet, personality, hits: FrozenSet[str]) -> bool:
         """Determine if tweet meets criteria for reply."""
-        tweet_text = tweet.text.lower()
-        
         # Basic criteria
         if "?" in tweet.text:  # Questions
             return True
@@ -62,22 +107,19 @@ class DecisionEngine:
         # Personality-based criteria
         if personality:
             humor_level = personality.get('humor_level', {}).get('score', 0.5)
-            if humor_level > 0.7 and any(word in tweet_text for word in ['funny', 'lol', 'joke', 'humor']):
+            if humor_level > 0.7 and 'humor' in hits:
                 return True
                 
             technical_depth = personality.get('technical_depth', {}).get('score', 0.5)
-            if technical_depth > 0.6 and any(word in tweet_text for word in ['tech', 'programming', 'code', 'software']):
+            if technical_depth > 0.6 and 'tech' in hits:
                 return True
         
         return False
         
-    def _meets_criteria_for_like(self, tweet, personality) -> bool:
+    def _meets_criteria_for_like(self, tweet, personality, hits: FrozenSet[str]) -> bool:
         """Determine if a tweet meets criteria for liking."""
-        tweet_text = tweet.text.lower()
-        
         # Basic positive indicators
-        positive_words = ['thank', 'awesome', 'great', 'excellent', 'amazing', 'love', 'brilliant']
-        if any(word in tweet_text for word in positive_words):
+        if 'positive' in hits:
             return True
             
         # Check engagement metrics
@@ -92,17 +134,14 @@ class DecisionEngine:
         
         return False
         
-    def _meets_criteria_for_retweet(self, tweet, personality) -> bool:
+    def _meets_criteria_for_retweet(self, tweet, personality, hits: FrozenSet[str]) -> bool:
         """Determine if a tweet meets criteria for retweeting."""
-        tweet_text = tweet.text.lower()
-        
         # Avoid retweeting retweets
-        if tweet_text.startswith('rt @') or 'via @' in tweet_text:
+        if 'rt_marker' in hits:
             return False
             
         # Look for valuable content
-        valuable_indicators = ['tutorial', 'guide', 'tip', 'resource', 'useful', 'important']
-        if any(word in tweet_text for word in valuable_indicators):
+        if 'valuable' in hits:
             return True
             
         # Check if it's from a verified or high-engagement account
@@ -118,11 +157,11 @@ class DecisionEngine:
         """Analyze mentions for responses."""
         decision = Decision()
         decision.should_reply = True
-        decision.reasoning = 'Responding to mention'
+        decision.reasons.append('Responding to mention')
         decision.confidence = 0.9
         
         # Also consider liking mentions as courtesy
         decision.should_like = True
-        decision.reasoning += ' and liking mention'
+        decision.reasons.append('and liking mention')
         
         return decision
@@ -1,54 +1,171 @@
 """Personality analyzer for building user profile."""
 
-import openai
-import json
-from typing import Dict, Any, Optional
+import re
+import functools
+import hashlib
+import orjson
+import tiktoken
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from loguru import logger
 
+from utils.text import URL_RE
+
+
+DIMENSIONS = (
+    'humor_level', 'formality', 'enthusiasm', 'technical_depth',
+    'controversy_tolerance', 'emoji_usage', 'hashtag_usage'
+)
+
+_RATING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "number"},
+        "confidence": {"type": "number"}
+    },
+    "required": ["score", "confidence"],
+    "additionalProperties": False
+}
+
+def response_format(dimensions: Tuple[str, ...]) -> Dict[str, Any]:
+    """Structured output format that guarantees exactly these dimensions come back."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "personality",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {dimension: _RATING_SCHEMA for dimension in dimensions},
+                "required": list(dimensions),
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+RESPONSE_FORMAT = response_format(DIMENSIONS)
+
+# Dimensions rated with less confidence than this are re-rated by the fallback model
+ESCALATION_CONFIDENCE = 0.5
+
+HASHTAG_RE = re.compile(r"#\w+")
+EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF\u2600-\u27BF]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Prompt token budgets for each section of the user's data
+BIO_TOKEN_BUDGET = 150
+TWEETS_TOKEN_BUDGET = 800
+LIKES_TOKEN_BUDGET = 800
+
+# Seven ratings need ~150 tokens; cap generation well above that
+ANALYSIS_MAX_TOKENS = 300
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding_for(model: str) -> 'tiktoken.Encoding':
+    """Get the tokenizer for a model, falling back to the current default."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def pack_texts(texts: List[str], budget: int, encoding: 'tiktoken.Encoding') -> str:
+    """Join as many distinct texts as fit in ``budget`` tokens, one per line.
+    
+    URLs carry no personality signal, so they are dropped before counting.
+    """
+    seen = set()
+    lines = []
+    used = 0
+    
+    for text in texts:
+        text = WHITESPACE_RE.sub(" ", URL_RE.sub("", text)).strip()
+        key = text.lower()
+        if not text or key in seen:
+            continue
+        seen.add(key)
+        
+        # +1 for the joining newline
+        tokens = len(encoding.encode(text)) + 1
+        if used + tokens > budget:
+            continue
+        lines.append(text)
+        used += tokens
+        
+    return "\n".join(lines)
+
 
 class PersonalityAnalyzer:
     """Analyzes user data to build personality profile."""
     
-    def __init__(self, config, db):
+    # Fixed instructions; the user's data goes in the trailing user message
+    SYSTEM_PROMPT = """You are a personality analyst. Analyze the user's social media data and provide insights.
+
+Analyze this user's personality based on their social media activity, given as their bio, recent tweets and recent likes.
+
+Please analyze and rate the following personality dimensions on a scale of 0.0 to 1.0:
+
+1. humor_level - How humorous/funny they are
+2. formality - How formal vs casual their communication is
+3. enthusiasm - How enthusiastic/energetic they are
+4. technical_depth - How technical/detailed their content is
+5. controversy_tolerance - How willing they are to engage with controversial topics
+6. emoji_usage - How frequently they use emojis
+7. hashtag_usage - How frequently they use hashtags
+
+Base emoji_usage and hashtag_usage on the USAGE statistics, which are measured over all of the user's tweets.
+
+Give each dimension a score and your confidence in it.
+"""
+    
+    def __init__(self, config, db, personality_cache, openai_bucket, openai_client):
         self.config = config
         self.db = db
-        self.openai_client = openai.OpenAI(api_key=config.openai.api_key)
+        self.personality_cache = personality_cache
+        self.openai_bucket = openai_bucket
+        self.openai_client = openai_client
         
     async def has_personality_data(self) -> bool:
         """Check if personality data exists."""
-        profile = await self.db.get_personality_profile()
-        return profile is not None
+        return await self.personality_cache.get() is not None
         
-    async def analyze(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Analyze user data and create personality profile."""
+    async def analyze(self, user_data: Dict[str, Any],
+                      on_delta: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, Any]]:
+        """Analyze user data and create personality profile.
+        
+        ``on_delta`` is called with each chunk of the response as it streams in.
+        """
         try:
             logger.info("Starting personality analysis...")
             
             # Prepare data for analysis
-            tweets_text = "\n".join([tweet['content'] for tweet in user_data.get('tweets', [])])
-            likes_text = "\n".join([like['content'] for like in user_data.get('likes', [])])
+            tweets = user_data.get('tweets', [])
+            likes = user_data.get('likes', [])
             bio = user_data.get('user_info', {}).get('bio', '')
             
             # Create analysis prompt
-            prompt = self._create_analysis_prompt(bio, tweets_text, likes_text)
-            
-            # Get AI analysis
-            response = self.openai_client.chat.completions.create(
-                model=self.config.openai.model,
-                messages=[
-                    {"role": "system", "content": "You are a personality analyst. Analyze the user's social media data and provide insights."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
+            system_prompt, prompt = self._create_analysis_prompt(
+                bio, tweets, likes, self._usage_stats(tweets)
             )
             
-            # Parse response
-            analysis_text = response.choices[0].message.content
-            personality_profile = self._parse_analysis(analysis_text)
-            
+            # Identical input gets an identical analysis, so skip the model
+            cache_key = self._cache_key(system_prompt, prompt)
+            personality_profile = await self.db.get_cached_analysis(cache_key)
+            if personality_profile:
+                logger.info("Reusing cached personality analysis")
+            else:
+                personality_profile = await self._call_model(
+                    self.config.openai.model, system_prompt, prompt, RESPONSE_FORMAT, on_delta
+                )
+                if personality_profile:
+                    personality_profile = await self._escalate(personality_profile, system_prompt, prompt)
+                    await self.db.save_cached_analysis(cache_key, personality_profile)
+                    
             # Save to database
             if personality_profile:
                 await self.db.save_personality_profile(personality_profile)
+                self.personality_cache.set(personality_profile)
                 logger.info("Personality analysis complete and saved")
                 return personality_profile
             else:
@@ -59,60 +176,106 @@ class PersonalityAnalyzer:
             logger.error(f"Personality analysis failed: {e}")
             return None
             
-    def _create_analysis_prompt(self, bio: str, tweets: str, likes: str) -> str:
-        """Create prompt for personality analysis."""
-        return f"""
-Analyze this user's personality based on their social media activity:
+    async def _escalate(self, profile: Dict[str, Dict[str, float]], system_prompt: str,
+                        prompt: str) -> Dict[str, Dict[str, float]]:
+        """Re-rate low-confidence dimensions with the fallback model."""
+        fallback = self.config.openai.fallback_model
+        uncertain = tuple(
+            dimension for dimension in DIMENSIONS
+            if profile.get(dimension, {}).get('confidence', 0.0) < ESCALATION_CONFIDENCE
+        )
+        if not fallback or fallback == self.config.openai.model or not uncertain:
+            return profile
+            
+        logger.info(f"Escalating {', '.join(uncertain)} to {fallback}")
+        prompt += f"\nRate only: {', '.join(uncertain)}\n"
+        rerated = await self._call_model(fallback, system_prompt, prompt, response_format(uncertain))
+        
+        return {**profile, **rerated} if rerated else profile
+        
+    async def _call_model(self, model: str, system_prompt: str, prompt: str,
+                          response_format: Dict[str, Any],
+                          on_delta: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, Dict[str, float]]]:
+        """Run the analysis prompt through a model and parse the profile."""
+        # Reserve roughly 4 chars per prompt token
+        await self.openai_bucket.acquire((len(system_prompt) + len(prompt)) // 4 + ANALYSIS_MAX_TOKENS)
+        
+        # Get AI analysis, streamed so the event loop keeps running between chunks
+        stream = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            response_format=response_format,
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            
+            # A refusal will never become valid JSON, so stop paying for it
+            if getattr(delta, 'refusal', None):
+                await stream.close()
+                logger.error(f"Personality analysis refused: {delta.refusal}")
+                return None
+                
+            if delta.content:
+                parts.append(delta.content)
+                if on_delta:
+                    on_delta(delta.content)
+            
+        # Parse response
+        return self._parse_analysis("".join(parts))
+        
+    def _cache_key(self, system_prompt: str, prompt: str) -> str:
+        """Hash everything that determines the model's answer."""
+        payload = orjson.dumps([
+            self.config.openai.model, self.config.openai.fallback_model, system_prompt, prompt
+        ])
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+        
+    def _usage_stats(self, tweets: List[str]) -> Dict[str, float]:
+        """Measure emoji and hashtag usage locally instead of asking the model to count."""
+        if not tweets:
+            return {'emoji_per_tweet': 0.0, 'hashtags_per_tweet': 0.0, 'avg_length': 0.0}
+            
+        count = len(tweets)
+        return {
+            'emoji_per_tweet': sum(len(EMOJI_RE.findall(t)) for t in tweets) / count,
+            'hashtags_per_tweet': sum(len(HASHTAG_RE.findall(t)) for t in tweets) / count,
+            'avg_length': sum(len(t) for t in tweets) / count
+        }
+        
+    def _create_analysis_prompt(self, bio: str, tweets: List[str], likes: List[str],
+                                stats: Dict[str, float]) -> Tuple[str, str]:
+        """Create (system, user) messages for personality analysis."""
+        encoding = _encoding_for(self.config.openai.model)
+        bio = encoding.decode(encoding.encode(bio or "")[:BIO_TOKEN_BUDGET])
+        tweets = pack_texts(tweets, TWEETS_TOKEN_BUDGET, encoding)
+        likes = pack_texts(likes, LIKES_TOKEN_BUDGET, encoding)
+        
+        return self.SYSTEM_PROMPT, f"""
+BIO: {bio}
 
-BIO: {bio[:500]}
+USAGE: {stats['emoji_per_tweet']:.2f} emoji per tweet, {stats['hashtags_per_tweet']:.2f} hashtags per tweet, {stats['avg_length']:.0f} characters per tweet on average
 
 RECENT TWEETS (sample):
-{tweets[:2000]}
+{tweets}
 
 RECENT LIKES (sample):
-{likes[:2000]}
-
-Please analyze and rate the following personality dimensions on a scale of 0.0 to 1.0:
-
-1. humor_level - How humorous/funny they are
-2. formality - How formal vs casual their communication is
-3. enthusiasm - How enthusiastic/energetic they are
-4. technical_depth - How technical/detailed their content is
-5. controversy_tolerance - How willing they are to engage with controversial topics
-6. emoji_usage - How frequently they use emojis
-7. hashtag_usage - How frequently they use hashtags
-
-Respond in JSON format:
-{{
-    "humor_level": {{"score": 0.7, "confidence": 0.8}},
-    "formality": {{"score": 0.3, "confidence": 0.9}},
-    ...
-}}
+{likes}
 """
     
     def _parse_analysis(self, analysis_text: str) -> Optional[Dict[str, Dict[str, float]]]:
         """Parse AI analysis response."""
         try:
-            # Try to extract JSON from response
-            start = analysis_text.find('{')
-            end = analysis_text.rfind('}') + 1
-            
-            if start != -1 and end != -1:
-                json_str = analysis_text[start:end]
-                return json.loads(json_str)
-            else:
-                # Fallback: create basic profile
-                logger.warning("Could not parse AI response, using fallback profile")
-                return {
-                    "humor_level": {"score": 0.5, "confidence": 0.5},
-                    "formality": {"score": 0.5, "confidence": 0.5},
-                    "enthusiasm": {"score": 0.5, "confidence": 0.5},
-                    "technical_depth": {"score": 0.5, "confidence": 0.5},
-                    "controversy_tolerance": {"score": 0.3, "confidence": 0.5},
-                    "emoji_usage": {"score": 0.5, "confidence": 0.5},
-                    "hashtag_usage": {"score": 0.5, "confidence": 0.5}
-                }
-                
-        except json.JSONDecodeError as e:
+            return orjson.loads(analysis_text)
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from analysis: {e}")
             return None
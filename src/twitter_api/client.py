@@ -1,295 +1,401 @@
 """X API client for the bot."""
 
-import tweepy
 import asyncio
-from typing import List, Optional, Dict, Any
+import time
+import httpx
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence, Tuple
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from loguru import logger
 
+from utils.ratelimit import TokenBucket, twitter_buckets
+from .auth import OAuth1
+
+
+API_V1 = "https://api.twitter.com/1.1"
+API_V2 = "https://api.twitter.com/2"
+
+TWEET_FIELDS = 'created_at,public_metrics,context_annotations'
+USER_FIELDS = 'username,name,description,public_metrics'
+
+# Shared immutable default for absent list fields
+_EMPTY: Tuple = ()
+
+# Seconds a looked-up user profile is reused before fetching it again
+USER_CACHE_TTL = 15 * 60
+
+# Concurrent read calls in flight; buckets pace them, this bounds the burst
+MAX_CONCURRENT_READS = 5
+
 
-@dataclass
 class Tweet:
     """Tweet data model."""
-    id: str
-    text: str
-    author: 'User'
-    created_at: datetime
-    public_metrics: Dict[str, int]
-    context_annotations: List[Dict] = None
-    referenced_tweets: List[Dict] = None
+    
+    __slots__ = ('id', 'text', 'author', 'created_at', 'public_metrics',
+                 'context_annotations', 'referenced_tweets')
+    
+    def __init__(self, id: str, text: str, author: 'User', created_at: datetime,
+                 public_metrics: Dict[str, int], context_annotations: Sequence[Dict] = _EMPTY,
+                 referenced_tweets: Sequence[Dict] = _EMPTY):
+        self.id = id
+        self.text = text
+        self.author = author
+        self.created_at = created_at
+        self.public_metrics = public_metrics
+        self.context_annotations = context_annotations
+        self.referenced_tweets = referenced_tweets
 
 
-@dataclass  
 class User:
     """User data model."""
-    id: str
-    username: str
-    name: str
-    description: str = ""
-    public_metrics: Dict[str, int] = None
+    
+    __slots__ = ('id', 'username', 'name', 'description', 'public_metrics')
+    
+    def __init__(self, id: str, username: str, name: str, description: str = "",
+                 public_metrics: Optional[Dict[str, int]] = None):
+        self.id = id
+        self.username = username
+        self.name = name
+        self.description = description
+        self.public_metrics = public_metrics
+
+
+@dataclass
+class TweetBatch:
+    """Batch of tweets by a single author, kept as parallel columns.
+    
+    Built straight from API results without a Tweet per row; ``batch[i]``
+    gives a Tweet view for code that wants one.
+    """
+    author: User
+    ids: List[str]
+    texts: List[str]
+    created_at: List[datetime]
+    public_metrics: List[Dict[str, int]]
+    context_annotations: List[Sequence[Dict]]
+    
+    @classmethod
+    def from_v2(cls, results: List[Dict[str, Any]], author: User) -> 'TweetBatch':
+        """Build a batch from v2 tweet objects."""
+        return cls(
+            author=author,
+            ids=[str(data['id']) for data in results],
+            texts=[data.get('text', '') for data in results],
+            created_at=[_parse_v2_time(data.get('created_at')) for data in results],
+            public_metrics=[data.get('public_metrics', {}) for data in results],
+            context_annotations=[data.get('context_annotations', _EMPTY) for data in results]
+        )
+        
+    def __len__(self) -> int:
+        return len(self.ids)
+        
+    def __getitem__(self, index: int) -> Tweet:
+        return Tweet(
+            id=self.ids[index],
+            text=self.texts[index],
+            author=self.author,
+            created_at=self.created_at[index],
+            public_metrics=self.public_metrics[index],
+            context_annotations=self.context_annotations[index]
+        )
+
+
+def _parse_v2_time(value: Optional[str]) -> datetime:
+    """Parse a v2 ISO 8601 timestamp, defaulting to now when it is missing."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else datetime.now(timezone.utc)
+
+
+def user_from_v2(user_data: Dict[str, Any], user_id: str = 'unknown') -> User:
+    """Build a User from a v2 user object."""
+    return User(
+        id=str(user_data.get('id', user_id)),
+        username=user_data.get('username', 'unknown'),
+        name=user_data.get('name', ''),
+        description=user_data.get('description') or "",
+        public_metrics=user_data.get('public_metrics')
+    )
+
+
+def tweet_from_v2(data: Dict[str, Any], user_data: Dict[str, Any]) -> Tweet:
+    """Build a Tweet from a v2 tweet object and its expanded author."""
+    return Tweet(
+        id=str(data['id']),
+        text=data.get('text', ''),
+        author=user_from_v2(user_data, data.get('author_id', 'unknown')),
+        created_at=_parse_v2_time(data.get('created_at')),
+        public_metrics=data.get('public_metrics', {}),
+        context_annotations=data.get('context_annotations', _EMPTY)
+    )
+
+
+def tweet_from_v1(status: Dict[str, Any]) -> Tweet:
+    """Build a Tweet from a v1.1 status object."""
+    author = status.get('user', {})
+    user = User(
+        id=str(author.get('id_str', 'unknown')),
+        username=author.get('screen_name', 'unknown'),
+        name=author.get('name', ''),
+        description=author.get('description') or ""
+    )
+    
+    text = (
+        status.get('full_text')
+        or status.get('extended_tweet', {}).get('full_text')
+        or status.get('text', '')
+    )
+    created_at = status.get('created_at')
+    return Tweet(
+        id=str(status['id_str']),
+        text=text,
+        author=user,
+        created_at=datetime.strptime(created_at, '%a %b %d %H:%M:%S %z %Y') if created_at else datetime.now(timezone.utc),
+        public_metrics={
+            'retweet_count': status.get('retweet_count', 0),
+            'favorite_count': status.get('favorite_count', 0),
+            'reply_count': status.get('reply_count', 0)  # Not available in v1.1 REST
+        }
+    )
 
 
 class TwitterClient:
     """X API client wrapper."""
     
-    def __init__(self, config):
+    def __init__(self, config, http_client: httpx.AsyncClient,
+                 buckets: Optional[Dict[str, TokenBucket]] = None):
         self.config = config
-        self.api_v1 = None
-        self.api_v2 = None
-        self._initialize_clients()
+        self.http = http_client
+        self.buckets = buckets or twitter_buckets()
+        self._user_cache: Dict[str, tuple] = {}
+        self._read_sem = asyncio.Semaphore(MAX_CONCURRENT_READS)
         
-    def _initialize_clients(self):
-        """Initialize X API clients."""
-        try:
-            # Twitter API v1.1 client (for likes, retweets, etc.)
-            auth = tweepy.OAuthHandler(
-                self.config.twitter.api_key,
-                self.config.twitter.api_secret
-            )
-            auth.set_access_token(
-                self.config.twitter.access_token,
-                self.config.twitter.access_token_secret
-            )
-            self.api_v1 = tweepy.API(auth, wait_on_rate_limit=True)
-            
-            # Twitter API v2 client (for advanced features)
-            self.api_v2 = tweepy.Client(
-                bearer_token=self.config.twitter.bearer_token,
-                consumer_key=self.config.twitter.api_key,
-                consumer_secret=self.config.twitter.api_secret,
-                access_token=self.config.twitter.access_token,
-                access_token_secret=self.config.twitter.access_token_secret,
-                wait_on_rate_limit=True
-            )
-            
-            logger.info("X API clients initialized successfully")
+        # v1.1 and write endpoints need user context; v2 reads use the app token
+        self._oauth = OAuth1(
+            config.twitter.api_key,
+            config.twitter.api_secret,
+            config.twitter.access_token,
+            config.twitter.access_token_secret
+        )
+        self._bearer_headers = {"Authorization": f"Bearer {config.twitter.bearer_token}"}
+        
+    async def _get(self, url: str, params: Dict[str, Any], user_auth: bool = False) -> Any:
+        """GET a JSON resource."""
+        async with self._read_sem:
+            if user_auth:
+                response = await self.http.get(url, params=params, auth=self._oauth)
+            else:
+                response = await self.http.get(url, params=params, headers=self._bearer_headers)
+        response.raise_for_status()
+        return response.json()
+        
+    async def _post(self, url: str, data: Optional[Dict[str, Any]] = None) -> Any:
+        """POST a form with user-context auth."""
+        response = await self.http.post(url, data=data, auth=self._oauth)
+        response.raise_for_status()
+        return response.json()
+        
+    async def _paginate(self, url: str, params: Dict[str, Any],
+                        limit: int) -> AsyncIterator[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+        """Follow v2 pagination tokens, yielding each page until ``limit`` results are seen.
+        
+        Each page is the result objects and the expanded users keyed by id.
+        """
+        params = dict(params)
+        remaining = limit
+        
+        while remaining > 0:
+            page = await self._get(url, params)
+            results = page.get('data', [])[:remaining]
+            remaining -= len(results)
+            users = {user_data['id']: user_data for user_data in page.get('includes', {}).get('users', [])}
+            yield results, users
             
-        except Exception as e:
-            logger.error(f"Failed to initialize X API clients: {e}")
-            raise
+            next_token = page.get('meta', {}).get('next_token')
+            if not next_token:
+                break
+            params['pagination_token'] = next_token
             
     async def verify_credentials(self) -> bool:
         """Verify X API credentials."""
         try:
-            # Run in thread to avoid blocking
-            user = await asyncio.get_event_loop().run_in_executor(
-                None, self.api_v1.verify_credentials
-            )
+            await self.buckets['verify_credentials'].acquire()
+            user = await self._get(f"{API_V1}/account/verify_credentials.json", {}, user_auth=True)
             if user:
-                logger.info(f"Verified credentials for @{user.screen_name}")
+                logger.info(f"Verified credentials for @{user['screen_name']}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Failed to verify credentials: {e}")
             return False
-            
-    async def get_user_tweets(self, username: str, count: int = 100) -> List[Tweet]:
-        """Get tweets from a specific user."""
+        
+    async def get_user_tweets(self, username: str, count: int = 100,
+                              since_id: Optional[str] = None) -> List[Tweet]:
+        """Get tweets from a specific user, optionally only those newer than since_id."""
+        batch = await self.get_user_tweet_batch(username, count, since_id)
+        if batch is None:
+            return []
+        return [batch[i] for i in range(len(batch))]
+        
+    async def get_user_tweet_batch(self, username: str, count: int = 100,
+                                   since_id: Optional[str] = None) -> Optional[TweetBatch]:
+        """Get a user's tweets as a columnar batch."""
         try:
-            def _get_tweets():
-                tweets = []
-                user_tweets = tweepy.Paginator(
-                    self.api_v2.get_users_tweets,
-                    username=username,
-                    max_results=min(count, 100),
-                    tweet_fields=['created_at', 'public_metrics', 'context_annotations'],
-                    user_fields=['username', 'name', 'description', 'public_metrics']
-                ).flatten(limit=count)
-                
-                for tweet in user_tweets:
-                    # Get user info
-                    user_response = self.api_v2.get_user(username=username, user_fields=['username', 'name', 'description', 'public_metrics'])
-                    user_data = user_response.data
-                    
-                    user = User(
-                        id=str(user_data.id),
-                        username=user_data.username,
-                        name=user_data.name,
-                        description=user_data.description or "",
-                        public_metrics=user_data.public_metrics
-                    )
-                    
-                    tweets.append(Tweet(
-                        id=str(tweet.id),
-                        text=tweet.text,
-                        author=user,
-                        created_at=tweet.created_at,
-                        public_metrics=tweet.public_metrics,
-                        context_annotations=getattr(tweet, 'context_annotations', [])
-                    ))
-                    
-                return tweets
+            # Every tweet shares the same author, so look it up once
+            user = await self.get_user_info(username)
+            if not user:
+                return None
                 
-            return await asyncio.get_event_loop().run_in_executor(None, _get_tweets)
+            results = [
+                data
+                async for page, _ in self._user_tweet_pages(user, count, since_id)
+                for data in page
+            ]
+            return TweetBatch.from_v2(results, user)
             
         except Exception as e:
             logger.error(f"Failed to get user tweets: {e}")
-            return []
+            return None
+        
+    async def iter_user_tweet_batches(self, username: str,
+                                      count: int = 100) -> AsyncIterator[TweetBatch]:
+        """Yield a user's tweets one API page at a time; errors propagate."""
+        user = await self.get_user_info(username)
+        if not user:
+            return
             
+        async for page, _ in self._user_tweet_pages(user, count):
+            yield TweetBatch.from_v2(page, user)
+        
+    async def _user_tweet_pages(self, user: User, count: int, since_id: Optional[str] = None
+                                ) -> AsyncIterator[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+        """Paginate a user's tweets."""
+        params = {
+            'max_results': min(count, 100),
+            'tweet.fields': TWEET_FIELDS
+        }
+        if since_id:
+            params['since_id'] = since_id
+            
+        await self.buckets['user_tweets'].acquire(-(-count // 100))
+        async for page in self._paginate(f"{API_V2}/users/{user.id}/tweets", params, count):
+            yield page
+        
     async def get_user_likes(self, user_id: str, count: int = 100) -> List[Tweet]:
         """Get tweets liked by a user."""
         try:
-            def _get_likes():
-                tweets = []
-                liked_tweets = tweepy.Paginator(
-                    self.api_v2.get_liked_tweets,
-                    id=user_id,
-                    max_results=min(count, 100),
-                    tweet_fields=['created_at', 'public_metrics', 'context_annotations'],
-                    user_fields=['username', 'name', 'description']
-                ).flatten(limit=count)
-                
-                for tweet in liked_tweets:
-                    # For simplicity, create a basic user object
-                    user = User(
-                        id="unknown",
-                        username="unknown",
-                        name="Unknown User"
-                    )
-                    
-                    tweets.append(Tweet(
-                        id=str(tweet.id),
-                        text=tweet.text,
-                        author=user,
-                        created_at=tweet.created_at,
-                        public_metrics=tweet.public_metrics,
-                        context_annotations=getattr(tweet, 'context_annotations', [])
-                    ))
-                    
-                return tweets
-                
-            return await asyncio.get_event_loop().run_in_executor(None, _get_likes)
-            
+            return [tweet async for page in self.iter_user_likes(user_id, count) for tweet in page]
         except Exception as e:
             logger.error(f"Failed to get user likes: {e}")
             return []
-            
+        
+    async def iter_user_likes(self, user_id: str, count: int = 100) -> AsyncIterator[List[Tweet]]:
+        """Yield tweets liked by a user one API page at a time; errors propagate."""
+        params = {
+            'max_results': min(count, 100),
+            'tweet.fields': TWEET_FIELDS,
+            'expansions': 'author_id',
+            'user.fields': USER_FIELDS
+        }
+        
+        await self.buckets['liked_tweets'].acquire(-(-count // 100))
+        async for results, users in self._paginate(f"{API_V2}/users/{user_id}/liked_tweets", params, count):
+            yield [tweet_from_v2(data, users.get(data.get('author_id'), {})) for data in results]
+        
     async def get_timeline_tweets(self, count: int = 50) -> List[Tweet]:
-        """Get tweets from user's timeline."""
-        try:
-            def _get_timeline():
-                tweets = []
-                timeline = self.api_v1.home_timeline(count=count, include_rts=True, tweet_mode='extended')
-                
-                for tweet in timeline:
-                    user = User(
-                        id=str(tweet.user.id),
-                        username=tweet.user.screen_name,
-                        name=tweet.user.name,
-                        description=tweet.user.description or ""
-                    )
-                    
-                    tweets.append(Tweet(
-                        id=str(tweet.id),
-                        text=tweet.full_text,
-                        author=user,
-                        created_at=tweet.created_at,
-                        public_metrics={
-                            'retweet_count': tweet.retweet_count,
-                            'favorite_count': tweet.favorite_count,
-                            'reply_count': 0  # Not available in v1.1
-                        }
-                    ))
-                    
-                return tweets
-                
-            return await asyncio.get_event_loop().run_in_executor(None, _get_timeline)
-            
-        except Exception as e:
-            logger.error(f"Failed to get timeline tweets: {e}")
-            return []
-            
+        """Get tweets from user's timeline.
+        
+        API errors propagate so the caller can tell a failed poll from a quiet one.
+        """
+        params = {'count': count, 'include_rts': 'true', 'tweet_mode': 'extended'}
+        
+        await self.buckets['home_timeline'].acquire()
+        timeline = await self._get(f"{API_V1}/statuses/home_timeline.json", params, user_auth=True)
+        
+        return [tweet_from_v1(status) for status in timeline]
+        
     async def get_mentions(self, count: int = 20) -> List[Tweet]:
-        """Get mentions of the bot."""
-        try:
-            def _get_mentions():
-                tweets = []
-                mentions = self.api_v1.mentions_timeline(count=count, tweet_mode='extended')
-                
-                for tweet in mentions:
-                    user = User(
-                        id=str(tweet.user.id),
-                        username=tweet.user.screen_name,
-                        name=tweet.user.name,
-                        description=tweet.user.description or ""
-                    )
-                    
-                    tweets.append(Tweet(
-                        id=str(tweet.id),
-                        text=tweet.full_text,
-                        author=user,
-                        created_at=tweet.created_at,
-                        public_metrics={
-                            'retweet_count': tweet.retweet_count,
-                            'favorite_count': tweet.favorite_count,
-                            'reply_count': 0
-                        }
-                    ))
-                    
-                return tweets
-                
-            return await asyncio.get_event_loop().run_in_executor(None, _get_mentions)
-            
-        except Exception as e:
-            logger.error(f"Failed to get mentions: {e}")
-            return []
-            
+        """Get mentions of the bot.
+        
+        API errors propagate so the caller can tell a failed poll from a quiet one.
+        """
+        params = {'count': count, 'tweet_mode': 'extended'}
+        
+        await self.buckets['mentions_timeline'].acquire()
+        mentions = await self._get(f"{API_V1}/statuses/mentions_timeline.json", params, user_auth=True)
+        
+        return [tweet_from_v1(status) for status in mentions]
+        
     async def like_tweet(self, tweet_id: str) -> bool:
         """Like a tweet."""
         try:
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.api_v1.create_favorite, tweet_id
-            )
+            await self.buckets['like'].acquire()
+            await self._post(f"{API_V1}/favorites/create.json", {'id': tweet_id})
             logger.info(f"Liked tweet {tweet_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to like tweet {tweet_id}: {e}")
             return False
-            
+        
     async def retweet(self, tweet_id: str) -> bool:
         """Retweet a tweet."""
         try:
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.api_v1.retweet, tweet_id
-            )
+            await self.buckets['retweet'].acquire()
+            await self._post(f"{API_V1}/statuses/retweet/{tweet_id}.json")
             logger.info(f"Retweeted tweet {tweet_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to retweet tweet {tweet_id}: {e}")
             return False
-            
+        
     async def reply_to_tweet(self, tweet_id: str, text: str) -> bool:
         """Reply to a tweet."""
         try:
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.api_v1.update_status, text, tweet_id
-            )
+            await self.buckets['reply'].acquire()
+            await self._post(f"{API_V1}/statuses/update.json", {
+                'status': text,
+                'in_reply_to_status_id': tweet_id,
+                'auto_populate_reply_metadata': 'true'
+            })
             logger.info(f"Replied to tweet {tweet_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to reply to tweet {tweet_id}: {e}")
             return False
+        
+    async def get_following(self, user_id: str, count: int = 1000) -> List[User]:
+        """Get accounts followed by a user."""
+        try:
+            params = {
+                'max_results': min(count, 1000),
+                'user.fields': USER_FIELDS
+            }
             
+            await self.buckets['following'].acquire(-(-count // 1000))
+            return [
+                user_from_v2(user_data)
+                async for page, _ in self._paginate(f"{API_V2}/users/{user_id}/following", params, count)
+                for user_data in page
+            ]
+            
+        except Exception as e:
+            logger.error(f"Failed to get following for {user_id}: {e}")
+            return []
+        
     async def get_user_info(self, username: str) -> Optional[User]:
-        """Get user information."""
+        """Get user information, cached for USER_CACHE_TTL seconds."""
+        cached = self._user_cache.get(username)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+            
         try:
-            def _get_user():
-                user_response = self.api_v2.get_user(
-                    username=username,
-                    user_fields=['username', 'name', 'description', 'public_metrics']
-                )
-                user_data = user_response.data
-                
-                return User(
-                    id=str(user_data.id),
-                    username=user_data.username,
-                    name=user_data.name,
-                    description=user_data.description or "",
-                    public_metrics=user_data.public_metrics
-                )
-                
-            return await asyncio.get_event_loop().run_in_executor(None, _get_user)
+            await self.buckets['user_lookup'].acquire()
+            response = await self._get(
+                f"{API_V2}/users/by/username/{username}",
+                {'user.fields': USER_FIELDS}
+            )
+            user = user_from_v2(response['data'])
+            
+            self._user_cache[username] = (time.monotonic() + USER_CACHE_TTL, user)
+            return user
             
         except Exception as e:
             logger.error(f"Failed to get user info for {username}: {e}")
@@ -0,0 +1,259 @@
+"""Push-based tweet ingestion for the bot."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+from aiohttp import web
+from loguru import logger
+
+from .client import TWEET_FIELDS, USER_FIELDS, Tweet, tweet_from_v1, tweet_from_v2
+
+
+STREAM_URL = "https://api.twitter.com/2/tweets/search/stream"
+RULES_URL = "https://api.twitter.com/2/tweets/search/stream/rules"
+
+# Filtered stream rules are capped at 512 characters on the basic tiers
+MAX_RULE_LENGTH = 512
+MAX_RULES = 5
+
+# The stream sends a keep-alive heartbeat every 20 seconds
+STREAM_TIMEOUT = httpx.Timeout(10.0, read=90.0)
+
+# Tags on the rules this bot manages; rules with other tags are left alone
+MENTION_TAG = "xbot:mention"
+TIMELINE_TAG = "xbot:timeline"
+
+
+class StreamingIngestor:
+    """Merges the filtered stream and Account Activity webhook into one queue.
+    
+    Iterating yields ``(source, tweet)`` tuples where ``source`` is either
+    ``"timeline"`` or ``"mention"``.
+    """
+    
+    def __init__(self, config, twitter_client):
+        self.config = config
+        self.twitter_client = twitter_client
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._runner: Optional[web.AppRunner] = None
+        # Stream requests share the client's connection pool
+        self._http: httpx.AsyncClient = twitter_client.http
+        self._headers = {"Authorization": f"Bearer {config.twitter.bearer_token}"}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connected = False
+        
+    def __aiter__(self):
+        return self
+        
+    async def __anext__(self) -> Tuple[str, Tweet]:
+        item = await self._queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+        
+    async def start(self):
+        """Start the stream and webhook listeners."""
+        self._loop = asyncio.get_running_loop()
+        
+        if self.config.streaming_enabled:
+            try:
+                await self._sync_rules()
+            except Exception as e:
+                logger.error(f"Failed to sync stream rules: {e}")
+            self._tasks.append(asyncio.create_task(self._stream_loop()))
+            logger.info("Filtered stream ingestion started")
+            
+        if self.config.webhook_enabled:
+            app = web.Application()
+            app.router.add_get('/webhook/twitter', self._handle_crc)
+            app.router.add_post('/webhook/twitter', self._handle_webhook)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.config.webhook_host, self.config.webhook_port)
+            await site.start()
+            logger.info(f"Webhook listening on {self.config.webhook_host}:{self.config.webhook_port}")
+        
+    def stop_nowait(self):
+        """Signal iterators to finish without waiting for cleanup."""
+        # May be called from a signal handler, so wake the loop explicitly
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        else:
+            self._queue.put_nowait(None)
+        
+    async def stop(self):
+        """Stop all listeners and release connections."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        
+    def put(self, source: str, tweet: Tweet):
+        """Enqueue a tweet for dispatch."""
+        self._queue.put_nowait((source, tweet))
+        
+    async def _sync_rules(self):
+        """Replace this bot's stream rules with followed accounts and bot mentions."""
+        rules = [{"value": f"@{self.config.bot_username} -from:{self.config.bot_username}", "tag": MENTION_TAG}]
+        
+        user_info = await self.twitter_client.get_user_info(self.config.bot_username)
+        if user_info:
+            following = await self.twitter_client.get_following(user_info.id)
+            rules.extend(self._build_follow_rules([u.username for u in following]))
+            
+        response = await self._http.get(RULES_URL, headers=self._headers)
+        response.raise_for_status()
+        existing = orjson.loads(response.content).get('data', [])
+            
+        ours = [rule['id'] for rule in existing if rule.get('tag') in (MENTION_TAG, TIMELINE_TAG)]
+        
+        # Rules the bot doesn't own still count against the account's cap
+        limit = MAX_RULES - (len(existing) - len(ours))
+        if len(rules) > limit:
+            logger.warning(f"Stream rules truncated from {len(rules)} to {max(limit, 0)}")
+            rules = rules[:max(limit, 0)]
+            
+        if ours:
+            response = await self._http.post(RULES_URL, json={"delete": {"ids": ours}}, headers=self._headers)
+            response.raise_for_status()
+            
+        if not rules:
+            return
+            
+        response = await self._http.post(RULES_URL, json={"add": rules}, headers=self._headers)
+        response.raise_for_status()
+            
+        logger.info(f"Synced {len(rules)} stream rules")
+        
+    def _build_follow_rules(self, usernames: List[str]) -> List[Dict[str, str]]:
+        """Pack ``from:`` clauses into as few rules as the length cap allows."""
+        rules = []
+        clauses: List[str] = []
+        
+        for username in usernames:
+            clause = f"from:{username}"
+            candidate = " OR ".join(clauses + [clause])
+            if clauses and len(candidate) > MAX_RULE_LENGTH:
+                rules.append({"value": " OR ".join(clauses), "tag": TIMELINE_TAG})
+                clauses = []
+            clauses.append(clause)
+            
+        if clauses:
+            rules.append({"value": " OR ".join(clauses), "tag": TIMELINE_TAG})
+            
+        return rules
+        
+    async def _stream_loop(self):
+        """Hold the stream open, reconnecting with backoff on failure."""
+        backoff = 5
+        params = {
+            'tweet.fields': TWEET_FIELDS,
+            'expansions': 'author_id',
+            'user.fields': USER_FIELDS
+        }
+        
+        while True:
+            try:
+                async with self._http.stream(
+                    'GET', STREAM_URL, params=params, headers=self._headers, timeout=STREAM_TIMEOUT
+                ) as response:
+                    if response.status_code in (401, 403):
+                        # Retrying cannot fix missing access, so fall back to polling
+                        logger.error(
+                            f"Filtered stream unavailable (HTTP {response.status_code}); "
+                            "it needs Pro access or above. Continuing with polling only"
+                        )
+                        return
+                    if response.status_code == 429:
+                        backoff = max(backoff, 60)
+                    response.raise_for_status()
+                    backoff = 5
+                    self.connected = True
+                    
+                    async for line in response.aiter_lines():
+                        # Blank lines are keep-alive heartbeats
+                        if not line.strip():
+                            continue
+                        self._handle_stream_line(line)
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Filtered stream disconnected: {e}")
+            finally:
+                self.connected = False
+                
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 320)
+        
+    def _handle_stream_line(self, line: str):
+        """Parse one stream payload and enqueue it."""
+        try:
+            payload = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed stream payload: {e}")
+            return
+            
+        data = payload.get('data')
+        if not data:
+            return
+            
+        users = {u['id']: u for u in payload.get('includes', {}).get('users', [])}
+        tags = {rule.get('tag') for rule in payload.get('matching_rules', [])}
+        source = "mention" if MENTION_TAG in tags else "timeline"
+        
+        self.put(source, tweet_from_v2(data, users.get(data.get('author_id'), {})))
+        
+    async def _handle_crc(self, request: web.Request) -> web.Response:
+        """Answer the Account Activity CRC challenge."""
+        crc_token = request.query.get('crc_token')
+        if not crc_token:
+            return web.Response(status=400)
+            
+        digest = hmac.new(
+            self.config.twitter.api_secret.encode(),
+            crc_token.encode(),
+            hashlib.sha256
+        ).digest()
+        return web.json_response({"response_token": "sha256=" + base64.b64encode(digest).decode()})
+        
+    async def _handle_webhook(self, request: web.Request) -> web.Response:
+        """Enqueue tweets delivered by the Account Activity API."""
+        body = await request.read()
+        signature = request.headers.get('x-twitter-webhooks-signature', '')
+        expected = "sha256=" + base64.b64encode(hmac.new(
+            self.config.twitter.api_secret.encode(),
+            body,
+            hashlib.sha256
+        ).digest()).decode()
+        
+        if not hmac.compare_digest(signature, expected):
+            logger.warning("Rejected webhook with invalid signature")
+            return web.Response(status=403)
+            
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return web.Response(status=400)
+            
+        bot_username = self.config.bot_username.lower()
+        for event in payload.get('tweet_create_events', []):
+            author = event.get('user', {})
+            if author.get('screen_name', '').lower() == bot_username:
+                continue
+                
+            mentions = event.get('entities', {}).get('user_mentions', [])
+            is_mention = any(m.get('screen_name', '').lower() == bot_username for m in mentions)
+            self.put("mention" if is_mention else "timeline", tweet_from_v1(event))
+            
+        return web.Response(status=200)
@@ -0,0 +1,93 @@
+"""In-memory caches for the X bot."""
+
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+
+class PersonalityCache:
+    """TTL cache in front of the stored personality profile."""
+    
+    def __init__(self, db, ttl: float = 300):
+        self.db = db
+        self.ttl = ttl
+        self._profile: Optional[Dict[str, Dict[str, float]]] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        
+    async def get(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Get the personality profile, reading the database at most once per TTL."""
+        if time.monotonic() < self._expires_at:
+            return self._profile
+            
+        # Concurrent workers share a single refresh
+        async with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._profile = await self.db.get_personality_profile()
+                self._expires_at = time.monotonic() + self.ttl
+            
+        return self._profile
+        
+    def set(self, profile: Dict[str, Dict[str, float]]):
+        """Store a freshly saved profile without reading it back."""
+        self._profile = profile
+        self._expires_at = time.monotonic() + self.ttl
+        
+    def invalidate(self):
+        """Drop the cached profile so the next read hits the database."""
+        self._profile = None
+        self._expires_at = 0.0
+
+
+class BloomFilter:
+    """Set membership with no false negatives and ``error_rate`` false positives."""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self._size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        
+    def _positions(self, key: str) -> Iterator[int]:
+        """Bit positions for a key, derived from one digest by double hashing."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hashes))
+        
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key)
+        )
+
+
+class LRUSet:
+    """Bounded set that evicts the least recently used key."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._keys: 'OrderedDict[str, None]' = OrderedDict()
+        
+    def add(self, key: str):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        
+    def discard(self, key: str):
+        self._keys.pop(key, None)
+        
+    def clear(self):
+        self._keys.clear()
+        
+    def __contains__(self, key: str) -> bool:
+        if key not in self._keys:
+            return False
+        self._keys.move_to_end(key)
+        return True
@@ -1,10 +1,80 @@
 """Configuration management for the X bot."""
 
 import os
+import functools
 import yaml
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+# libyaml's C loader parses much faster; PyYAML may be built without it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+@functools.lru_cache(maxsize=8)
+def _read_yaml(path: str, mtime: float) -> Dict[str, Any]:
+    """Parse a YAML file; the mtime argument makes edits miss the cache."""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=SafeLoader) or {}
+
+
+TRUE_VALUES = frozenset(("1", "true", "yes", "on"))
+
+# Every environment setting as name: (type, default)
+ENV_SETTINGS: Dict[str, Tuple[type, Any]] = {
+    "TWITTER_API_KEY": (str, ""),
+    "TWITTER_API_SECRET": (str, ""),
+    "TWITTER_ACCESS_TOKEN": (str, ""),
+    "TWITTER_ACCESS_TOKEN_SECRET": (str, ""),
+    "TWITTER_BEARER_TOKEN": (str, ""),
+    "OPENAI_API_KEY": (str, ""),
+    "PERSONALITY_MODEL": (str, "gpt-4o-mini"),
+    "PERSONALITY_MODEL_FALLBACK": (str, "gpt-4o"),
+    "RESPONSE_TEMPERATURE": (float, 0.7),
+    "MAX_RESPONSE_LENGTH": (int, 280),
+    "OPENAI_TOKENS_PER_MINUTE": (int, 40000),
+    "BOT_USERNAME": (str, ""),
+    "BOT_NAME": (str, "PersonalizedXBot"),
+    "DEBUG_MODE": (bool, True),
+    "DRY_RUN": (bool, True),
+    "LITE_MODE": (bool, False),
+    "DATABASE_URL": (str, "sqlite:///xbot.db"),
+    "MAX_LIKES_PER_HOUR": (int, 50),
+    "MAX_TWEETS_PER_HOUR": (int, 10),
+    "MAX_RETWEETS_PER_HOUR": (int, 5),
+    "MIN_ENGAGEMENT_SCORE": (float, 0.6),
+    "AVOID_CONTROVERSIAL_TOPICS": (bool, True),
+    "SAFE_MODE": (bool, True),
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_env(raw: Tuple[Tuple[str, Optional[str]], ...]) -> Dict[str, Any]:
+    """Convert raw environment values per ENV_SETTINGS; unset means the default."""
+    settings = {}
+    for name, value in raw:
+        kind, default = ENV_SETTINGS[name]
+        if value is None:
+            settings[name] = default
+        elif kind is bool:
+            settings[name] = value.strip().lower() in TRUE_VALUES
+        else:
+            try:
+                settings[name] = kind(value)
+            except ValueError:
+                raise ValueError(f"{name} must be {kind.__name__}, got {value!r}") from None
+    return settings
+
+
+def load_env_settings() -> Dict[str, Any]:
+    """Parse all environment settings at once, failing on the first bad value.
+    
+    The result is cached per set of raw values and must not be modified.
+    """
+    return _parse_env(tuple((name, os.environ.get(name)) for name in ENV_SETTINGS))
 
 
 @dataclass
@@ -21,9 +91,11 @@ class TwitterConfig:
 class OpenAIConfig:
     """OpenAI API configuration."""
     api_key: str
-    model: str = "gpt-4"
+    model: str = "gpt-4o-mini"
+    fallback_model: str = "gpt-4o"
     temperature: float = 0.7
     max_tokens: int = 280
+    tokens_per_minute: int = 40000
 
 
 @dataclass
@@ -45,51 +117,61 @@ class Config:
     def _load_config(self):
         """Load configuration from YAML file."""
         if self.config_path.exists():
-            with open(self.config_path, 'r') as f:
-                self.yaml_config = yaml.safe_load(f)
+            self.yaml_config = _read_yaml(str(self.config_path), self.config_path.stat().st_mtime)
         else:
             self.yaml_config = {}
             
     def _load_env_vars(self):
         """Load configuration from environment variables."""
+        env = load_env_settings()
+        
         # X API configuration
         self.twitter = TwitterConfig(
-            api_key=os.getenv("TWITTER_API_KEY", ""),
-            api_secret=os.getenv("TWITTER_API_SECRET", ""),
-            access_token=os.getenv("TWITTER_ACCESS_TOKEN", ""),
-            access_token_secret=os.getenv("TWITTER_ACCESS_TOKEN_SECRET", ""),
-            bearer_token=os.getenv("TWITTER_BEARER_TOKEN", "")
+            api_key=env["TWITTER_API_KEY"],
+            api_secret=env["TWITTER_API_SECRET"],
+            access_token=env["TWITTER_ACCESS_TOKEN"],
+            access_token_secret=env["TWITTER_ACCESS_TOKEN_SECRET"],
+            bearer_token=env["TWITTER_BEARER_TOKEN"]
         )
         
         # OpenAI configuration
         self.openai = OpenAIConfig(
-            api_key=os.getenv("OPENAI_API_KEY", ""),
-            model=os.getenv("PERSONALITY_MODEL", "gpt-4"),
-            temperature=float(os.getenv("RESPONSE_TEMPERATURE", "0.7")),
-            max_tokens=int(os.getenv("MAX_RESPONSE_LENGTH", "280"))
+            api_key=env["OPENAI_API_KEY"],
+            model=env["PERSONALITY_MODEL"],
+            fallback_model=env["PERSONALITY_MODEL_FALLBACK"],
+            temperature=env["RESPONSE_TEMPERATURE"],
+            max_tokens=env["MAX_RESPONSE_LENGTH"],
+            tokens_per_minute=env["OPENAI_TOKENS_PER_MINUTE"]
         )
         
         # Bot configuration
-        self.bot_username = os.getenv("BOT_USERNAME", "")
-        self.bot_name = os.getenv("BOT_NAME", "PersonalizedXBot")
-        self.debug_mode = os.getenv("DEBUG_MODE", "true").lower() == "true"
-        self.dry_run = os.getenv("DRY_RUN", "true").lower() == "true"
-        self.lite_mode = os.getenv("LITE_MODE", "false").lower() == "true"
+        self.bot_username = env["BOT_USERNAME"]
+        self.bot_name = env["BOT_NAME"]
+        self.debug_mode = env["DEBUG_MODE"]
+        self.dry_run = env["DRY_RUN"]
+        self.lite_mode = env["LITE_MODE"]
         
         # Database
-        self.database_url = os.getenv("DATABASE_URL", "sqlite:///xbot.db")
+        self.database_url = env["DATABASE_URL"]
         
         # Rate limits
         self.rate_limits = RateLimits(
-            likes_per_hour=int(os.getenv("MAX_LIKES_PER_HOUR", "50")),
-            replies_per_hour=int(os.getenv("MAX_TWEETS_PER_HOUR", "10")),
-            retweets_per_hour=int(os.getenv("MAX_RETWEETS_PER_HOUR", "5"))
+            likes_per_hour=env["MAX_LIKES_PER_HOUR"],
+            replies_per_hour=env["MAX_TWEETS_PER_HOUR"],
+            retweets_per_hour=env["MAX_RETWEETS_PER_HOUR"]
         )
         
         # Content filtering
-        self.min_engagement_score = float(os.getenv("MIN_ENGAGEMENT_SCORE", "0.6"))
-        self.avoid_controversial = os.getenv("AVOID_CONTROVERSIAL_TOPICS", "true").lower() == "true"
-        self.safe_mode = os.getenv("SAFE_MODE", "true").lower() == "true"
+        self.min_engagement_score = env["MIN_ENGAGEMENT_SCORE"]
+        self.avoid_controversial = env["AVOID_CONTROVERSIAL_TOPICS"]
+        self.safe_mode = env["SAFE_MODE"]
+        
+    def invalidate(self):
+        """Re-read the YAML file and drop settings cached from it."""
+        self._load_config()
+        for name, attr in vars(type(self)).items():
+            if isinstance(attr, functools.cached_property):
+                self.__dict__.pop(name, None)
         
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value from YAML config."""
@@ -104,42 +186,72 @@ class Config:
                 
         return value
         
-    @property
+    @functools.cached_property
     def timeline_check_interval(self) -> int:
         """Timeline check interval in minutes."""
         return self.get('schedule.timeline_check_interval', 15)
         
-    @property
+    @functools.cached_property
     def mentions_check_interval(self) -> int:
         """Mentions check interval in minutes."""
         return self.get('schedule.mentions_check_interval', 5)
         
-    @property
+    @functools.cached_property
+    def reconciliation_interval(self) -> int:
+        """Fallback poll interval in minutes while the stream is connected."""
+        return self.get('schedule.reconciliation_interval', 60)
+        
+    @functools.cached_property
+    def worker_concurrency(self) -> int:
+        """Maximum number of tweets processed concurrently."""
+        return self.get('schedule.worker_concurrency', 4)
+        
+    @functools.cached_property
+    def streaming_enabled(self) -> bool:
+        """Whether to ingest tweets from the filtered stream (needs Pro access or above)."""
+        return self.get('streaming.enabled', False)
+        
+    @functools.cached_property
+    def webhook_enabled(self) -> bool:
+        """Whether to serve the Account Activity webhook."""
+        return self.get('streaming.webhook_enabled', False)
+        
+    @functools.cached_property
+    def webhook_host(self) -> str:
+        """Bind address for the Account Activity webhook."""
+        return self.get('streaming.webhook_host', '0.0.0.0')
+        
+    @functools.cached_property
+    def webhook_port(self) -> int:
+        """Port for the Account Activity webhook."""
+        return self.get('streaming.webhook_port', 8080)
+        
+    @functools.cached_property
     def preferred_topics(self) -> List[str]:
         """List of preferred topics."""
         return self.get('content.preferred_topics', [])
         
-    @property
+    @functools.cached_property
     def avoided_topics(self) -> List[str]:
         """List of topics to avoid."""
         return self.get('content.avoided_topics', [])
         
-    @property
+    @functools.cached_property
     def personality_dimensions(self) -> List[str]:
         """List of personality dimensions to track."""
         return self.get('personality.dimensions', [])
         
-    @property
+    @functools.cached_property
     def like_criteria(self) -> Dict[str, Any]:
         """Criteria for liking tweets."""
         return self.get('interactions.like_criteria', {})
         
-    @property
+    @functools.cached_property
     def reply_criteria(self) -> Dict[str, Any]:
         """Criteria for replying to tweets."""
         return self.get('interactions.reply_criteria', {})
         
-    @property
+    @functools.cached_property
     def retweet_criteria(self) -> Dict[str, Any]:
         """Criteria for retweeting."""
         return self.get('interactions.retweet_criteria', {})
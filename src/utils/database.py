@@ -2,12 +2,164 @@
 
 import sqlite3
 import asyncio
-import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import queue
+import threading
+import time
+import orjson
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 from loguru import logger
 
+from .cache import BloomFilter, LRUSet
+
+
+def _adapt_datetime(value: datetime) -> str:
+    """Bind datetimes as naive UTC text, the format CURRENT_TIMESTAMP writes."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(' ')
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    """Parse a stored timestamp selected as ``"col [timestamp]"``."""
+    return datetime.fromisoformat(value.decode())
+
+
+# Registered explicitly because the sqlite3 defaults are deprecated since 3.12
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter('timestamp', _convert_timestamp)
+
+
+def _utcnow() -> datetime:
+    """Current time as naive UTC, comparable with stored timestamps."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Applied to every connection: WAL lets readers run alongside the writer and
+# NORMAL sync only fsyncs at checkpoints, which WAL keeps crash-safe.
+# auto_vacuum has to come before journal_mode, which writes the file header;
+# it only takes effect on new databases and is a no-op afterwards
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+# SQLite 3.45+ stores JSON as compact binary JSONB; read it back with
+# json(metadata) or query fields with json_extract(metadata, '$.key')
+METADATA_PARAM = 'jsonb(?)' if sqlite3.sqlite_version_info >= (3, 45, 0) else '?'
+
+# IDs per IN (...) lookup, well under SQLite's bound variable limit
+ID_CHUNK_SIZE = 500
+
+# Window the in-memory action rate limits are counted over, in seconds
+RATE_LIMIT_WINDOW = 3600
+
+# sqlite3 keeps a per-connection cache of prepared statements keyed by SQL
+# text; size it to hold every statement this module issues
+STATEMENT_CACHE_SIZE = 256
+
+# Queued writes are flushed together once this many are waiting or the
+# first one has waited this many seconds
+WRITE_BATCH_SIZE = 500
+WRITE_BATCH_WINDOW = 0.05
+
+# In-process answers for is_tweet_processed: the bloom filter rules out
+# unseen tweets and the LRU confirms recently seen ones
+PROCESSED_BLOOM_CAPACITY = 1_000_000
+PROCESSED_LRU_SIZE = 50_000
+
+# Statement for each kind of queued write
+WRITE_STATEMENTS = {
+    'interaction': '''
+        INSERT INTO interaction_log
+        (interaction_type, tweet_id, reasoning, response_text)
+        VALUES (?, ?, ?, ?)
+    ''',
+}
+
+
+# Every table and index, created in one script and one transaction
+SCHEMA_SQL = """
+BEGIN;
+
+-- Personality profile table
+CREATE TABLE IF NOT EXISTS personality_profile (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dimension TEXT NOT NULL,
+    score REAL NOT NULL,
+    confidence REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- User data table (your tweets, likes, etc.)
+CREATE TABLE IF NOT EXISTS user_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tweet_id TEXT UNIQUE NOT NULL,
+    content TEXT NOT NULL,
+    interaction_type TEXT NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    metadata JSON,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Processed tweets table
+CREATE TABLE IF NOT EXISTS processed_tweets (
+    tweet_id TEXT PRIMARY KEY,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Interaction log table
+CREATE TABLE IF NOT EXISTS interaction_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tweet_id TEXT NOT NULL,
+    interaction_type TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reasoning TEXT,
+    response_text TEXT,
+    success BOOLEAN DEFAULT TRUE
+);
+
+-- Content analysis cache
+CREATE TABLE IF NOT EXISTS content_analysis (
+    tweet_id TEXT PRIMARY KEY,
+    relevance_score REAL,
+    quality_score REAL,
+    sentiment_score REAL,
+    topics TEXT,
+    analysis_data TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Personality analysis responses keyed by a hash of the prompt
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    cache_key TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Rate limits are tracked in memory; this table was never written
+DROP TABLE IF EXISTS rate_limits;
+
+-- Indexes for the time-window lookups and cleanup range deletes
+CREATE INDEX IF NOT EXISTS idx_interaction_log_ts ON interaction_log(timestamp);
+CREATE INDEX IF NOT EXISTS idx_interaction_log_type_ts ON interaction_log(interaction_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_processed_tweets_pa ON processed_tweets(processed_at);
+CREATE INDEX IF NOT EXISTS idx_content_analysis_ca ON content_analysis(created_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_ca ON analysis_cache(created_at);
+
+-- One row per dimension so profile saves can upsert in place
+CREATE UNIQUE INDEX IF NOT EXISTS idx_personality_profile_dimension ON personality_profile(dimension);
+
+COMMIT;
+"""
+
 
 @dataclass
 class Tweet:
@@ -33,6 +185,16 @@ class InteractionRecord:
     response_text: Optional[str] = None
 
 
+def _resolve(future: asyncio.Future, result: Any, error: Optional[Exception]):
+    """Complete a database call's future unless its caller gave up on it."""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
 class Database:
     """Database manager for the X bot."""
     
@@ -44,125 +206,198 @@ class Database:
         else:
             self.db_path = "xbot.db"
             
+        # SQLite serializes writers anyway, so one dedicated thread keeps every
+        # call on a single warm connection and off the shared default pool;
+        # the connection is opened lazily on that thread and only used there
+        self._conn: Optional[sqlite3.Connection] = None
+        self._calls: queue.Queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, name='xbot-db', daemon=True)
+        self._thread.start()
+        
+        # Background writer for log_interaction(s)
+        self._write_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # Only touched from the event loop thread
+        self._processed_bloom = BloomFilter(PROCESSED_BLOOM_CAPACITY)
+        self._processed_recent = LRUSet(PROCESSED_LRU_SIZE)
+        
+        # Epoch times of this window's actions per interaction type; the
+        # process is the source of truth and interaction_log is the audit trail
+        self._recent_actions: Dict[str, Deque[float]] = defaultdict(deque)
+        
+    def _connection(self) -> sqlite3.Connection:
+        """Get the database thread's persistent connection."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.db_path, cached_statements=STATEMENT_CACHE_SIZE,
+                detect_types=sqlite3.PARSE_COLNAMES
+            )
+            for pragma in CONNECTION_PRAGMAS:
+                self._conn.execute(pragma)
+        return self._conn
+        
+    def close(self):
+        """Stop the database thread, which closes its connection."""
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        self._calls.put(None)
+        self._thread.join()
+            
+    def _serve(self):
+        """Run queued calls in order on the database thread."""
+        while True:
+            call = self._calls.get()
+            if call is None:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                return
+                
+            future, func, args = call
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+                
+            # Hand the outcome straight to the waiting loop
+            try:
+                future.get_loop().call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                # The loop closed while the call ran; nobody is waiting
+                pass
+        
+    async def _call(self, func, *args):
+        """Run a blocking database function on the database thread."""
+        # Nothing would ever resolve the future once the thread has stopped
+        if self._closed:
+            raise RuntimeError("Database is closed")
+            
+        future = asyncio.get_running_loop().create_future()
+        self._calls.put((future, func, args))
+        return await future
+        
     async def initialize(self):
         """Initialize database tables."""
         logger.info("Initializing database...")
         
         # Run in thread to avoid blocking
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._create_tables
-        )
+        await self._call(self._create_tables)
         
-    def _create_tables(self):
-        """Create database tables if they don't exist."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Personality profile table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS personality_profile (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dimension TEXT NOT NULL,
-                score REAL NOT NULL,
-                confidence REAL NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # User data table (your tweets, likes, etc.)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tweet_id TEXT UNIQUE NOT NULL,
-                content TEXT NOT NULL,
-                interaction_type TEXT NOT NULL,
-                timestamp TIMESTAMP NOT NULL,
-                metadata TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Processed tweets table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS processed_tweets (
-                tweet_id TEXT PRIMARY KEY,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Interaction log table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interaction_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tweet_id TEXT NOT NULL,
-                interaction_type TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                reasoning TEXT,
-                response_text TEXT,
-                success BOOLEAN DEFAULT TRUE
+        for tweet_id in await self._call(self._get_processed_ids):
+            self._processed_bloom.add(tweet_id)
+            
+        # Carry rate limits over from actions logged before a restart
+        for interaction_type, logged_at in await self._call(self._get_window_actions):
+            self._recent_actions[interaction_type].append(
+                logged_at.replace(tzinfo=timezone.utc).timestamp()
             )
-        ''')
+            
+        self._write_q = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        
+    async def flush(self):
+        """Wait until every queued write has been committed."""
+        if self._write_q is not None:
+            await self._write_q.join()
+        
+    async def _enqueue(self, kind: str, row: Tuple):
+        """Queue a row for the background writer."""
+        if self._write_q is None:
+            # Not initialized yet, so there is no writer to hand it to
+            await self._call(self._write_batch, [(kind, row)])
+            return
+            
+        await self._write_q.put((kind, row))
         
-        # Content analysis cache
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS content_analysis (
-                tweet_id TEXT PRIMARY KEY,
-                relevance_score REAL,
-                quality_score REAL,
-                sentiment_score REAL,
-                topics TEXT,
-                analysis_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+    async def _writer_loop(self):
+        """Commit queued writes in batches, one transaction per batch."""
+        loop = asyncio.get_running_loop()
         
-        # Rate limiting table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rate_limits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                action_type TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(action_type, timestamp)
-            )
-        ''')
+        while True:
+            batch = [await self._write_q.get()]
+            deadline = loop.time() + WRITE_BATCH_WINDOW
+            
+            while len(batch) < WRITE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_q.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                
+            try:
+                await self._call(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} queued rows: {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+        
+    def _write_batch(self, batch: List[Tuple[str, Tuple]]):
+        """Insert queued rows with one executemany per table in a single transaction."""
+        rows: Dict[str, List[Tuple]] = {}
+        for kind, row in batch:
+            rows.setdefault(kind, []).append(row)
+            
+        conn = self._connection()
+        with conn:
+            for kind, kind_rows in rows.items():
+                conn.executemany(WRITE_STATEMENTS[kind], kind_rows)
         
-        conn.commit()
-        conn.close()
+    def _create_tables(self):
+        """Create database tables if they don't exist."""
+        conn = self._connection()
+        try:
+            conn.executescript(SCHEMA_SQL)
+        except sqlite3.Error:
+            # The script opens its own transaction; don't leave it half applied
+            if conn.in_transaction:
+                conn.rollback()
+            raise
         
     async def save_personality_profile(self, profile: Dict[str, Dict[str, float]]):
         """Save personality analysis results."""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._save_personality_profile, profile
-        )
+        await self._call(self._save_personality_profile, profile)
         
     def _save_personality_profile(self, profile: Dict[str, Dict[str, float]]):
         """Save personality profile to database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        rows = [
+            (dimension, data.get('score', 0.0), data.get('confidence', 0.0))
+            for dimension, data in profile.items()
+        ]
         
-        # Clear existing profile
-        cursor.execute('DELETE FROM personality_profile')
+        conn = self._connection()
         
-        # Insert new profile
-        for dimension, data in profile.items():
-            cursor.execute('''
+        # Update dimensions in place and drop any the new profile no longer has
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('''
                 INSERT INTO personality_profile (dimension, score, confidence)
                 VALUES (?, ?, ?)
-            ''', (dimension, data.get('score', 0.0), data.get('confidence', 0.0)))
+                ON CONFLICT(dimension) DO UPDATE SET
+                    score = excluded.score,
+                    confidence = excluded.confidence,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            conn.execute(
+                f"DELETE FROM personality_profile WHERE dimension NOT IN ({', '.join('?' * len(rows))})",
+                [row[0] for row in rows]
+            )
             
-        conn.commit()
-        conn.close()
-        
     async def get_personality_profile(self) -> Optional[Dict[str, Dict[str, float]]]:
         """Get personality profile from database."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._get_personality_profile
-        )
+        return await self._call(self._get_personality_profile)
         
     def _get_personality_profile(self) -> Optional[Dict[str, Dict[str, float]]]:
         """Get personality profile from database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -170,7 +405,6 @@ class Database:
         ''')
         
         rows = cursor.fetchall()
-        conn.close()
         
         if not rows:
             return None
@@ -184,187 +418,304 @@ class Database:
             
         return profile
         
+    async def get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Get a previously computed personality analysis."""
+        return await self._call(self._get_cached_analysis, cache_key)
+        
+    def _get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Get a cached personality analysis from database."""
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            'SELECT profile FROM analysis_cache WHERE cache_key = ?',
+            (cache_key,)
+        )
+        
+        row = cursor.fetchone()
+        
+        return orjson.loads(row[0]) if row else None
+        
+    async def save_cached_analysis(self, cache_key: str, profile: Dict[str, Dict[str, float]]):
+        """Remember a personality analysis for identical future input."""
+        await self._call(self._save_cached_analysis, cache_key, profile)
+        
+    def _save_cached_analysis(self, cache_key: str, profile: Dict[str, Dict[str, float]]):
+        """Save a personality analysis to the cache table."""
+        conn = self._connection()
+        
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analysis_cache (cache_key, profile) VALUES (?, ?)',
+                (cache_key, orjson.dumps(profile).decode())
+            )
+        
     async def save_user_data(self, data: List[Dict[str, Any]]):
         """Save user's X data."""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._save_user_data, data
-        )
+        await self._call(self._save_user_data, data)
         
     def _save_user_data(self, data: List[Dict[str, Any]]):
         """Save user data to database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for item in data:
-            cursor.execute('''
-                INSERT OR REPLACE INTO user_data 
-                (tweet_id, content, interaction_type, timestamp, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
+        # Serialize metadata before taking the connection
+        rows = [
+            (
                 item['tweet_id'],
                 item['content'],
                 item['interaction_type'],
                 item['timestamp'],
-                json.dumps(item.get('metadata', {}))
-            ))
-            
-        conn.commit()
-        conn.close()
+                orjson.dumps(item.get('metadata', {})).decode()
+            )
+            for item in data
+        ]
         
-    async def is_tweet_processed(self, tweet_id: str) -> bool:
-        """Check if tweet has already been processed."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._is_tweet_processed, tweet_id
-        )
+        conn = self._connection()
         
-    def _is_tweet_processed(self, tweet_id: str) -> bool:
-        """Check if tweet is already processed."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # One statement and one transaction for the whole batch; the
+        # connection context rolls back if any row fails
+        with conn:
+            conn.executemany(f'''
+                INSERT OR REPLACE INTO user_data 
+                (tweet_id, content, interaction_type, timestamp, metadata)
+                VALUES (?, ?, ?, ?, {METADATA_PARAM})
+            ''', rows)
         
-        cursor.execute(
-            'SELECT 1 FROM processed_tweets WHERE tweet_id = ?',
-            (tweet_id,)
-        )
+    async def get_last_seen(self, interaction_type: str) -> Optional[str]:
+        """Get the newest stored tweet ID for an interaction type."""
+        return await self._call(self._get_last_seen, interaction_type)
         
-        result = cursor.fetchone()
-        conn.close()
+    def _get_last_seen(self, interaction_type: str) -> Optional[str]:
+        """Get the newest stored tweet ID from user data."""
+        conn = self._connection()
+        cursor = conn.cursor()
         
-        return result is not None
+        # Tweet IDs are snowflakes, so numeric order is chronological
+        cursor.execute('''
+            SELECT tweet_id FROM user_data
+            WHERE interaction_type = ?
+            ORDER BY CAST(tweet_id AS INTEGER) DESC
+            LIMIT 1
+        ''', (interaction_type,))
         
-    async def mark_tweet_processed(self, tweet_id: str):
-        """Mark tweet as processed."""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._mark_tweet_processed, tweet_id
-        )
+        row = cursor.fetchone()
         
-    def _mark_tweet_processed(self, tweet_id: str):
-        """Mark tweet as processed in database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return row[0] if row else None
         
-        cursor.execute(
-            'INSERT OR IGNORE INTO processed_tweets (tweet_id) VALUES (?)',
-            (tweet_id,)
-        )
+    def _remember_processed(self, tweet_ids):
+        """Record tweets as processed in the in-process caches."""
+        for tweet_id in tweet_ids:
+            self._processed_bloom.add(tweet_id)
+            self._processed_recent.add(tweet_id)
         
-        conn.commit()
-        conn.close()
+    def _get_processed_ids(self) -> List[str]:
+        """Get every processed tweet ID to seed the bloom filter."""
+        conn = self._connection()
+        return [row[0] for row in conn.execute('SELECT tweet_id FROM processed_tweets')]
         
-    async def log_interaction(self, interaction_type: str, tweet_id: str, 
-                            reasoning: str, response_text: Optional[str] = None):
-        """Log an interaction."""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._log_interaction, interaction_type, tweet_id, reasoning, response_text
-        )
+    async def is_tweet_processed(self, tweet_id: str) -> bool:
+        """Check if tweet has already been processed."""
+        if tweet_id not in self._processed_bloom:
+            return False
+        if tweet_id in self._processed_recent:
+            return True
+            
+        # Possibly a bloom false positive or an old tweet, so ask the database
+        processed = await self._call(self._is_tweet_processed, tweet_id)
+        if processed:
+            self._processed_recent.add(tweet_id)
+        return processed
         
-    def _log_interaction(self, interaction_type: str, tweet_id: str, 
-                        reasoning: str, response_text: Optional[str] = None):
-        """Log interaction to database."""
-        conn = sqlite3.connect(self.db_path)
+    def _is_tweet_processed(self, tweet_id: str) -> bool:
+        """Check if tweet is already processed."""
+        conn = self._connection()
+        
+        row = conn.execute(
+            'SELECT EXISTS(SELECT 1 FROM processed_tweets WHERE tweet_id = ?)',
+            (tweet_id,)
+        ).fetchone()
+        
+        return bool(row[0])
+        
+    async def are_tweets_processed(self, tweet_ids: List[str]) -> Set[str]:
+        """Get which of the given tweets have already been processed."""
+        processed = set()
+        unknown = []
+        for tweet_id in tweet_ids:
+            if tweet_id not in self._processed_bloom:
+                continue
+            if tweet_id in self._processed_recent:
+                processed.add(tweet_id)
+            else:
+                unknown.append(tweet_id)
+            
+        # Everything the caches cannot answer goes to the database in one call
+        if unknown:
+            found = await self._call(self._get_processed_among, unknown)
+            for tweet_id in found:
+                self._processed_recent.add(tweet_id)
+            processed |= found
+            
+        return processed
+        
+    def _get_processed_among(self, tweet_ids: List[str]) -> Set[str]:
+        """Get the processed tweets among the given IDs."""
+        conn = self._connection()
+        processed = set()
+        
+        for start in range(0, len(tweet_ids), ID_CHUNK_SIZE):
+            chunk = tweet_ids[start:start + ID_CHUNK_SIZE]
+            cursor = conn.execute(
+                f"SELECT tweet_id FROM processed_tweets WHERE tweet_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            processed.update(row[0] for row in cursor)
+            
+        return processed
+        
+    async def claim_tweet(self, tweet_id: str) -> bool:
+        """Atomically mark a tweet as processed; True if this caller won it."""
+        return tweet_id in await self.claim_tweets([tweet_id])
+        
+    async def claim_tweets(self, tweet_ids: List[str]) -> Set[str]:
+        """Atomically mark tweets as processed and return the ones newly claimed."""
+        claimed = await self._call(self._claim_tweets, tweet_ids)
+        self._remember_processed(tweet_ids)
+        return claimed
+        
+    def _claim_tweets(self, tweet_ids: List[str]) -> Set[str]:
+        """Insert processed rows in one transaction, keeping those that did not exist."""
+        claimed = set()
+        if not tweet_ids:
+            return claimed
+            
+        conn = self._connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO interaction_log 
-            (tweet_id, interaction_type, reasoning, response_text)
-            VALUES (?, ?, ?, ?)
-        ''', (tweet_id, interaction_type, reasoning, response_text))
+        # The insert itself is the check, so concurrent workers cannot both win;
+        # a failure rolls back every claim made so far
+        with conn:
+            for tweet_id in tweet_ids:
+                cursor.execute(
+                    'INSERT INTO processed_tweets (tweet_id) VALUES (?) ON CONFLICT(tweet_id) DO NOTHING',
+                    (tweet_id,)
+                )
+                if cursor.rowcount == 1:
+                    claimed.add(tweet_id)
+            
+        return claimed
+        
+    async def release_tweets(self, tweet_ids: List[str]):
+        """Give up claims on tweets so they can be processed again."""
+        await self._call(self._release_tweets, tweet_ids)
+        # The bloom filter cannot forget, so released tweets fall through to the database
+        for tweet_id in tweet_ids:
+            self._processed_recent.discard(tweet_id)
+        
+    def _release_tweets(self, tweet_ids: List[str]):
+        """Delete processed rows for tweets whose handling failed."""
+        if not tweet_ids:
+            return
+            
+        conn = self._connection()
         
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.executemany(
+                'DELETE FROM processed_tweets WHERE tweet_id = ?',
+                [(tweet_id,) for tweet_id in tweet_ids]
+            )
         
+    async def log_interaction(self, interaction_type: str, tweet_id: str, 
+                            reasoning: str, response_text: Optional[str] = None):
+        """Log an interaction; the write is batched in the background."""
+        await self._enqueue('interaction', (interaction_type, tweet_id, reasoning, response_text))
+        
+    async def log_interactions(self, interactions: List[Tuple[str, str, str, Optional[str]]]):
+        """Log several interactions as (type, tweet_id, reasoning, response_text)."""
+        for interaction in interactions:
+            await self._enqueue('interaction', interaction)
+            
     async def get_recent_interactions(self, hours: int = 24) -> List[InteractionRecord]:
         """Get recent interactions."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._get_recent_interactions, hours
-        )
+        return await self._call(self._get_recent_interactions, hours)
         
     def _get_recent_interactions(self, hours: int) -> List[InteractionRecord]:
         """Get recent interactions from database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        since = datetime.now() - timedelta(hours=hours)
+        since = _utcnow() - timedelta(hours=hours)
         
         cursor.execute('''
-            SELECT id, tweet_id, interaction_type, timestamp, reasoning, response_text
+            SELECT id, tweet_id, interaction_type, timestamp AS "timestamp [timestamp]",
+                   reasoning, response_text
             FROM interaction_log
             WHERE timestamp > ?
             ORDER BY timestamp DESC
         ''', (since,))
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        records = []
-        for row in rows:
-            records.append(InteractionRecord(
-                id=row[0],
-                tweet_id=row[1],
-                interaction_type=row[2],
-                timestamp=datetime.fromisoformat(row[3]),
-                reasoning=row[4],
-                response_text=row[5]
-            ))
-            
-        return records
+        # Columns are in InteractionRecord field order and the timestamp
+        # arrives already converted, so rows map straight onto records
+        return [InteractionRecord(*row) for row in cursor]
         
     async def can_perform_action(self, action_type: str, max_per_hour: int) -> bool:
         """Check if action is within rate limits."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._can_perform_action, action_type, max_per_hour
-        )
+        actions = self._recent_actions[action_type]
+        cutoff = time.time() - RATE_LIMIT_WINDOW
+        while actions and actions[0] <= cutoff:
+            actions.popleft()
+            
+        return len(actions) < max_per_hour
+        
+    async def reserve_action(self, action_type: str, max_per_hour: int) -> bool:
+        """Take a slot in the action's hourly limit; False if none is left.
+        
+        The slot is counted from the moment it is taken, so concurrent workers
+        cannot overshoot the limit while their interactions wait to be logged.
+        """
+        if not await self.can_perform_action(action_type, max_per_hour):
+            return False
+            
+        self._recent_actions[action_type].append(time.time())
+        return True
         
-    def _can_perform_action(self, action_type: str, max_per_hour: int) -> bool:
-        """Check rate limits for action."""
-        conn = sqlite3.connect(self.db_path)
+    def _get_window_actions(self) -> List[Tuple[str, datetime]]:
+        """Get (type, timestamp) of interactions logged within the rate limit window."""
+        conn = self._connection()
         cursor = conn.cursor()
         
-        # Count actions in the last hour
-        since = datetime.now() - timedelta(hours=1)
+        since = _utcnow() - timedelta(seconds=RATE_LIMIT_WINDOW)
         
         cursor.execute('''
-            SELECT COUNT(*) FROM interaction_log
-            WHERE interaction_type = ? AND timestamp > ?
-        ''', (action_type, since))
-        
-        count = cursor.fetchone()[0]
-        conn.close()
+            SELECT interaction_type, timestamp AS "timestamp [timestamp]"
+            FROM interaction_log
+            WHERE timestamp > ?
+            ORDER BY timestamp
+        ''', (since,))
         
-        return count < max_per_hour
+        return cursor.fetchall()
         
     async def cleanup_old_data(self, days: int = 90):
         """Clean up old data from database."""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._cleanup_old_data, days
-        )
+        await self._call(self._cleanup_old_data, days)
+        self._processed_recent.clear()
         
     def _cleanup_old_data(self, days: int):
         """Clean up old data from database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        cutoff = datetime.now() - timedelta(days=days)
+        cutoff = _utcnow() - timedelta(days=days)
         
-        # Clean up old processed tweets
-        cursor.execute(
-            'DELETE FROM processed_tweets WHERE processed_at < ?',
-            (cutoff,)
-        )
-        
-        # Clean up old interaction logs
-        cursor.execute(
-            'DELETE FROM interaction_log WHERE timestamp < ?',
-            (cutoff,)
-        )
-        
-        # Clean up old content analysis
-        cursor.execute(
-            'DELETE FROM content_analysis WHERE created_at < ?',
-            (cutoff,)
-        )
+        # All deletes share one write transaction and one commit
+        with conn:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM processed_tweets WHERE processed_at < ?', (cutoff,))
+            cursor.execute('DELETE FROM interaction_log WHERE timestamp < ?', (cutoff,))
+            cursor.execute('DELETE FROM content_analysis WHERE created_at < ?', (cutoff,))
+            cursor.execute('DELETE FROM analysis_cache WHERE created_at < ?', (cutoff,))
         
-        conn.commit()
-        conn.close()
+        # Return freed pages to the OS without a full VACUUM, then refresh
+        # the planner statistics the indexes rely on
+        cursor.execute('PRAGMA incremental_vacuum(1000)').fetchall()
+        cursor.execute('PRAGMA optimize')
         
         logger.info(f"Cleaned up data older than {days} days")
@@ -0,0 +1,86 @@
+"""Client-side rate limiting for the X bot."""
+
+import asyncio
+import random
+import time
+from typing import Dict
+
+
+# X API limits per endpoint as (requests, window in seconds)
+TWITTER_LIMITS = {
+    'home_timeline': (15, 15 * 60),
+    'mentions_timeline': (75, 15 * 60),
+    'user_tweets': (900, 15 * 60),
+    'liked_tweets': (75, 15 * 60),
+    'following': (15, 15 * 60),
+    'user_lookup': (900, 15 * 60),
+    'like': (50, 15 * 60),
+    'retweet': (50, 15 * 60),
+    'reply': (100, 15 * 60),
+    'verify_credentials': (75, 15 * 60),
+}
+
+
+class TokenBucket:
+    """Async token bucket that paces callers under a steady rate."""
+    
+    def __init__(self, rate_per_sec: float, burst: float):
+        self.rate = rate_per_sec
+        self.capacity = burst
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        
+    def _refill(self):
+        """Add the tokens earned since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        
+    async def acquire(self, cost: float = 1):
+        """Wait until ``cost`` tokens are available and consume them."""
+        # A request larger than the bucket would otherwise wait forever
+        cost = min(cost, self.capacity)
+        
+        async with self._lock:
+            while True:
+                self._refill()
+                
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                    
+                await asyncio.sleep((cost - self._tokens) / self.rate)
+        
+    @classmethod
+    def for_window(cls, requests: int, window: float) -> 'TokenBucket':
+        """Build a bucket that never exceeds ``requests`` in any ``window`` seconds."""
+        burst = max(1, requests // 10)
+        # Burst plus refill over one window must stay within the limit
+        return cls(max(requests - burst, 1) / window, burst)
+
+
+class DecorrelatedJitter:
+    """Decorrelated jitter backoff: each delay is random in [base, 3 * previous]."""
+    
+    def __init__(self, base: float, cap: float):
+        self.base = base
+        self.cap = cap
+        self._delay = base
+        
+    def next(self) -> float:
+        """Return the next delay in seconds."""
+        self._delay = min(self.cap, random.uniform(self.base, self._delay * 3))
+        return self._delay
+        
+    def reset(self):
+        """Start over from the base delay after a success."""
+        self._delay = self.base
+
+
+def twitter_buckets() -> Dict[str, TokenBucket]:
+    """Create one bucket per X API endpoint."""
+    return {
+        endpoint: TokenBucket.for_window(requests, window)
+        for endpoint, (requests, window) in TWITTER_LIMITS.items()
+    }
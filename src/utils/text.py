@@ -0,0 +1,108 @@
+"""Tweet text measurement following X's weighted character counting."""
+
+import re
+import unicodedata
+from typing import Iterator, Tuple
+
+
+MAX_TWEET_LENGTH = 280
+
+# twitter-text v3: characters in these ranges weigh 1, everything else 2
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+
+# Every URL is shortened to a t.co link of this length
+URL_LENGTH = 23
+URL_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+
+ZWJ = '\u200d'
+ELLIPSIS = '\u2026'
+
+
+def _char_weight(char: str) -> int:
+    """Weight of a single code point."""
+    code = ord(char)
+    for low, high in _LIGHT_RANGES:
+        if low <= code <= high:
+            return 1
+    return 2
+
+
+def _extends_cluster(char: str) -> bool:
+    """Whether a code point attaches to the preceding grapheme."""
+    code = ord(char)
+    return (
+        unicodedata.combining(char) != 0
+        or 0xFE00 <= code <= 0xFE0F      # variation selectors
+        or 0x1F3FB <= code <= 0x1F3FF    # skin tone modifiers
+        or 0xE0020 <= code <= 0xE007F    # tag sequences (subdivision flags)
+        or code == 0x20E3                # keycap
+    )
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def graphemes(text: str) -> Iterator[str]:
+    """Split text into user-perceived characters.
+    
+    Covers combining marks, emoji modifiers, ZWJ sequences and flag pairs,
+    which is enough to never cut a visible character in half.
+    """
+    cluster = ""
+    for char in text:
+        if cluster and (
+            _extends_cluster(char)
+            or cluster.endswith(ZWJ)
+            or char == ZWJ
+            or (_is_regional_indicator(char) and len(cluster) == 1 and _is_regional_indicator(cluster))
+        ):
+            cluster += char
+            continue
+        if cluster:
+            yield cluster
+        cluster = char
+    if cluster:
+        yield cluster
+
+
+def _grapheme_weight(cluster: str) -> int:
+    """Weight of one grapheme; emoji sequences count as a single heavy character."""
+    if len(cluster) > 1 and any(ord(c) > 0xFFFF or c == ZWJ or c == '\ufe0f' for c in cluster):
+        return 2
+    return sum(_char_weight(c) for c in cluster)
+
+
+def _segments(text: str) -> Iterator[Tuple[str, int]]:
+    """Yield (piece, weight) for each URL and each grapheme outside URLs."""
+    position = 0
+    for match in URL_RE.finditer(text):
+        for cluster in graphemes(text[position:match.start()]):
+            yield cluster, _grapheme_weight(cluster)
+        yield match.group(), URL_LENGTH
+        position = match.end()
+    for cluster in graphemes(text[position:]):
+        yield cluster, _grapheme_weight(cluster)
+
+
+def weighted_length(text: str) -> int:
+    """Length of text as counted against the tweet limit."""
+    return sum(weight for _, weight in _segments(unicodedata.normalize('NFC', text)))
+
+
+def truncate_tweet(text: str, limit: int = MAX_TWEET_LENGTH) -> str:
+    """Truncate text to fit the tweet limit without splitting graphemes or URLs."""
+    text = unicodedata.normalize('NFC', text)
+    if weighted_length(text) <= limit:
+        return text
+        
+    budget = limit - _char_weight(ELLIPSIS)
+    pieces = []
+    used = 0
+    for piece, weight in _segments(text):
+        if used + weight > budget:
+            break
+        pieces.append(piece)
+        used += weight
+        
+    return "".join(pieces).rstrip() + ELLIPSIS